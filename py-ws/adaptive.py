@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+# (width, height, shadow, quality) from the best looking to the cheapest
+LEVELS = [
+    (640, 400, True, 90),
+    (480, 300, True, 85),
+    (320, 200, True, 80),
+    (320, 200, False, 70),
+    (240, 150, False, 60),
+    (160, 100, False, 50),
+]
+
+
+class AdaptiveController:
+    """
+    Scales the capture resolution, shadows and encoder quality to hold `target_fps`.
+
+    Every `interval` seconds the frame budget is compared with the time
+    spent capturing and encoding a frame, the capture rate, and the send
+    time and delivered frame rate of the slowest subscriber. The stream goes one
+    level down as soon as one of them misses the target, and one level
+    up after `patience` windows with everything under half the budget,
+    so more viewers lower the quality instead of the frame rate. A step
+    up that fails within `HELD` windows doubles the patience, up to
+    `max_patience`, and one that holds halves it back towards `patience`.
+
+    :param simulation: (Simulation) whose camera is configured
+    :param frame_cache: (FrameCache) whose encoder quality is configured
+    :param broadcaster: (Broadcaster) measuring the encode and send times
+    :param target_fps: (float) frame rate to hold
+    :param level: (int) index in LEVELS to start at
+    :param interval: (float) seconds between two decisions
+    :param patience: (int) windows under budget before going one level up
+    :param max_patience: (int) largest patience after failed steps up
+    """
+
+    # windows after which a step up is considered to hold
+    HELD = 3
+
+    def __init__(self, simulation, frame_cache, broadcaster, target_fps=30, level=2,
+                 interval=1.0, patience=3, max_patience=24):
+        self.simulation = simulation
+        self.frame_cache = frame_cache
+        self.broadcaster = broadcaster
+        self.target_fps = target_fps
+        self.level = level
+        self.interval = interval
+        self.base_patience = patience
+        self.max_patience = max_patience
+        self.patience = patience
+        self._calm = 0
+        # windows since the quality was last raised
+        self._since_raise = None
+        self.apply()
+
+    def apply(self):
+        width, height, shadow, quality = LEVELS[self.level]
+        self.simulation.configure(width, height, shadow)
+        self.frame_cache.quality = quality
+        print(f"stream level {self.level}: {width}x{height}, "
+              f"shadow {'on' if shadow else 'off'}, quality {quality}")
+
+    def decide(self, frame_seconds, captured_fps, pushed_fps, clients):
+        """
+        :param frame_seconds: (float) time to capture and encode a frame
+        :param captured_fps: (float) frames captured per second over the window
+        :param pushed_fps: (float) frames pushed to the subscribers per second
+        :param clients: (list) (send seconds, delivered fps) of every subscriber
+        :return: (int) -1 to lower the quality, 1 to raise it, 0 to keep it
+        """
+        budget = 1 / self.target_fps
+
+        # a client gets fewer frames than pushed when its stale ones are dropped
+        behind = any(send_seconds > budget or delivered_fps < 0.9 * pushed_fps
+                     for send_seconds, delivered_fps in clients)
+        if frame_seconds > budget or captured_fps < 0.85 * self.target_fps or behind:
+            if self._since_raise is not None and self._since_raise < self.HELD:
+                self.patience = min(self.patience * 2, self.max_patience)
+            self._since_raise = None
+            self._calm = 0
+            return -1
+
+        if self._since_raise is not None:
+            self._since_raise += 1
+            if self._since_raise == self.HELD:
+                self.patience = max(self.patience // 2, self.base_patience)
+
+        idle = all(send_seconds < budget / 2 for send_seconds, _ in clients)
+        if frame_seconds < budget / 2 and idle:
+            self._calm += 1
+            if self._calm >= self.patience:
+                self._calm = 0
+                self._since_raise = 0
+                return 1
+        else:
+            self._calm = 0
+        return 0
+
+    async def run(self):
+        simulation = self.simulation
+        broadcaster = self.broadcaster
+        captured = simulation.captured
+        published = broadcaster.published
+        sent = {}
+        start = time.perf_counter()
+
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            elapsed, start = now - start, now
+
+            captured_fps = (simulation.captured - captured) / elapsed
+            pushed_fps = (broadcaster.published - published) / elapsed
+            captured, published = simulation.captured, broadcaster.published
+
+            clients = []
+            for subscriber in broadcaster.subscribers.values():
+                # subscribers that joined during the window are judged from the next one
+                if subscriber in sent:
+                    clients.append((subscriber.send_seconds,
+                                    (subscriber.sent - sent[subscriber]) / elapsed))
+            sent = {subscriber: subscriber.sent for subscriber in broadcaster.subscribers.values()}
+
+            frame_seconds = simulation.capture_seconds + broadcaster.encode_seconds
+            change = self.decide(frame_seconds, captured_fps, pushed_fps, clients)
+
+            level = min(max(self.level - change, 0), len(LEVELS) - 1)
+            if level != self.level:
+                self.level = level
+                self.apply()
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import websockets
+
+from protocol import DELTA_PREFIX, TEXT_MODE
+
+# weight of the last measure in the moving averages of the timings
+SMOOTHING = 0.2
+
+
+class Subscriber:
+    """
+    Sends pushed frames to one client.
+
+    Only the latest frame is kept: when a new frame arrives while the
+    previous one is still waiting, the stale one is dropped instead of
+    queued, so a slow client skips frames but never falls behind.
+
+    :param websocket: the client connection
+    :param codec: (str) codec of the binary frames, None for base64 text
+    """
+
+    def __init__(self, websocket, codec):
+        self.websocket = websocket
+        self.codec = codec
+        self.latest = None
+        self.sent = 0
+        self.dropped = 0
+        # moving average of the time to hand a frame to the connection
+        self.send_seconds = 0.0
+        self._ready = asyncio.Event()
+        self._task = asyncio.ensure_future(self._send_loop())
+
+    @property
+    def pending(self):
+        """
+        True while the last offered frame has not been sent yet
+        """
+        return self.latest is not None
+
+    def offer(self, frame):
+        if self.latest is not None:
+            self.dropped += 1
+        self.latest = frame
+        self._ready.set()
+
+    async def _send_loop(self):
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                frame, self.latest = self.latest, None
+                if frame is not None:
+                    start = time.perf_counter()
+                    await self.websocket.send(frame)
+                    elapsed = time.perf_counter() - start
+                    self.send_seconds += SMOOTHING * (elapsed - self.send_seconds)
+                    self.sent += 1
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def close(self):
+        self._task.cancel()
+
+
+class Broadcaster:
+    """
+    Pushes every new frame of `source` once to all the subscribers,
+    at most `max_fps` times per second.
+
+    :param source: (FrameCache) where the frames come from, `refresh()`
+        returns the version of its current frame
+    :param render: (callable) codec, keyframe -> message of the current frame,
+        the whole frame when keyframe is True
+    :param max_fps: (float) highest rate frames are pushed at
+    """
+
+    def __init__(self, source, render, max_fps=30):
+        self.source = source
+        self.render = render
+        self.max_fps = max_fps
+        # websocket -> Subscriber
+        self.subscribers = {}
+        self.version = None
+        # frames pushed so far, and moving average of the time to encode one
+        self.published = 0
+        self.encode_seconds = 0.0
+
+    def subscribe(self, websocket, codec):
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is None:
+            subscriber = Subscriber(websocket, codec)
+            self.subscribers[websocket] = subscriber
+        subscriber.codec = codec
+
+        # start with the current frame instead of waiting for the next one
+        self.resync(websocket)
+
+    def resync(self, websocket):
+        """
+        offer the whole current frame to a subscriber, in place of any pending delta
+        """
+        subscriber = self.subscribers[websocket]
+        self.source.refresh()
+        frame = self.render(subscriber.codec, True)
+        if frame is not None:
+            subscriber.offer(frame)
+
+    def unsubscribe(self, websocket):
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is not None:
+            subscriber.close()
+
+    def publish(self):
+        """
+        offer the current frame to every subscriber, encoded once per codec
+        """
+        start = time.perf_counter()
+        frames = {}
+        for subscriber in self.subscribers.values():
+            # a delta only applies on top of the frame before it: replacing an
+            # unsent frame with it would leave the client on a frame no later
+            # delta applies to, so that subscriber gets the whole frame instead
+            keyframe = (subscriber.codec is not TEXT_MODE and subscriber.codec.startswith(DELTA_PREFIX)
+                        and subscriber.pending)
+            key = subscriber.codec, keyframe
+            if key not in frames:
+                frames[key] = self.render(subscriber.codec, keyframe)
+            if frames[key] is not None:
+                subscriber.offer(frames[key])
+
+        if frames:
+            elapsed = time.perf_counter() - start
+            self.encode_seconds += SMOOTHING * (elapsed - self.encode_seconds)
+        self.published += 1
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        interval = 1 / self.max_fps
+
+        while True:
+            start = loop.time()
+
+            version = self.source.refresh()
+            if version != self.version:
+                self.version = version
+                self.publish()
+
+            await asyncio.sleep(max(interval - (loop.time() - start), 0))
@@ -0,0 +1,93 @@
+import numpy as np
+from PIL import Image
+
+from protocol import encode_image, pack_delta
+
+
+class DeltaEncoder:
+    """
+    Finds the tiles that changed between consecutive frames.
+
+    Each frame is compared to the previous frame given, tile by tile, the changed
+    tiles are packed into one image and sent with their coordinates.
+    A keyframe replaces the delta every `keyframe_interval` frames, or
+    when most of the tiles changed anyway.
+
+    :param tile_size: (int) width and height of the tiles in pixels
+    :param keyframe_interval: (int) frames between two keyframes
+    :param max_changed: (float) fraction of changed tiles above which a keyframe is sent
+    """
+
+    def __init__(self, tile_size=32, keyframe_interval=60, max_changed=0.5):
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+        self.max_changed = max_changed
+        # frames padded to whole tiles, the current one and the previous one
+        self._current = None
+        self._previous = None
+        self._count = 0
+        self.frame_id = None
+        self.base_id = None
+        self.is_keyframe = True
+        # (column, row) of the tiles changed since the base frame
+        self.tiles = []
+
+    def update(self, pixels, frame_id):
+        """
+        compare a new frame to the previous one
+        :param pixels: (np.ndarray) RGBA frame, shape (height, width, 4)
+        :param frame_id: (int) id of the new frame
+        """
+        height, width = pixels.shape[:2]
+        rows = -(-height // self.tile_size)
+        columns = -(-width // self.tile_size)
+        shape = (rows * self.tile_size, columns * self.tile_size, 4)
+
+        if self._current is None or self._current.shape != shape:
+            self._current = np.zeros(shape, dtype=np.uint8)
+            self._previous = np.zeros(shape, dtype=np.uint8)
+            # no previous frame of this size to diff with
+            self._count = 0
+
+        self._current, self._previous = self._previous, self._current
+        self._current[:height, :width] = pixels
+
+        self.base_id, self.frame_id = self.frame_id, frame_id
+        self.is_keyframe = self._count % self.keyframe_interval == 0
+        self._count += 1
+        if self.is_keyframe:
+            self.tiles = []
+            return
+
+        changed = (self._current != self._previous).any(axis=-1)
+        changed = changed.reshape(rows, self.tile_size, columns, self.tile_size).any(axis=(1, 3))
+        if changed.mean() > self.max_changed:
+            self.is_keyframe = True
+            self.tiles = []
+            return
+
+        self.tiles = [(column, row) for row, column in zip(*np.nonzero(changed))]
+
+    def atlas(self):
+        """
+        :return: (PIL.Image) the changed tiles packed row by row, as many per row as in the frame
+        """
+        size = self.tile_size
+        columns = self._current.shape[1] // size
+        rows = max(-(-len(self.tiles) // columns), 1)
+
+        atlas = np.zeros((rows * size, columns * size, 4), dtype=np.uint8)
+        for i, (column, row) in enumerate(self.tiles):
+            y, x = divmod(i, columns)
+            atlas[y * size:(y + 1) * size, x * size:(x + 1) * size] = \
+                self._current[row * size:(row + 1) * size, column * size:(column + 1) * size]
+        return Image.fromarray(atlas, 'RGBA')
+
+    def encode(self, width, height, codec, quality=80):
+        """
+        :return: (bytes) the delta frame of the last update, which must not be a keyframe
+        """
+        # nothing changed, the client only has to move to the new frame id
+        data = encode_image(self.atlas(), codec, quality) if self.tiles else b''
+        return pack_delta(self.frame_id, self.base_id, width, height, codec,
+                          self.tile_size, self.tiles, data)
@@ -0,0 +1,162 @@
+import base64
+import os
+
+import numpy as np
+from PIL import Image
+
+from delta import DeltaEncoder
+from protocol import DELTA_PREFIX, KEYFRAME, TEXT_MODE, encode_image, pack_delta, pack_frame
+
+
+class FrameCache:
+    """
+    Keeps the latest frame of an image file encoded in memory.
+
+    The file is decoded again only when its mtime or size changes, each
+    codec encodes a frame at most once and every client is then served
+    the same cached payload.
+    A frame producer running in the same process can hand its frames
+    to `publish` instead of writing the file.
+    Clients in delta mode get only the tiles that changed since the
+    previous frame, see `DeltaEncoder`.
+
+    :param path: (str) image file written by the frame producer, None
+        when the frames are only published
+    :param quality: (int) quality of the lossy codecs (jpeg, webp)
+    :param tile_size: (int) size of the tiles of the delta frames
+    :param keyframe_interval: (int) delta frames between two keyframes
+    """
+
+    def __init__(self, path, quality=80, tile_size=32, keyframe_interval=60):
+        self.path = path
+        self.quality = quality
+        self.tile_size = tile_size
+        self.keyframe_interval = keyframe_interval
+        # bumped every time the frame changes, sent as the frame id
+        self.version = 0
+        self.image = None
+        self._stat = None
+        # codec -> encoded bytes of the current frame
+        self._encoded = {}
+        self._text = None
+        self._binary = {}
+        # frames are diffed only when a delta client asks for them, so the
+        # deltas apply to the last frame sent, not to skipped ones
+        self._delta = DeltaEncoder(tile_size, keyframe_interval)
+        self._delta_version = None
+        self._delta_messages = {}
+        self._keyframes = {}
+
+    def refresh(self):
+        """
+        reload the frame if the file changed since the last call
+        :return: (int) version of the current frame
+        """
+        if self.path is None:
+            return self.version
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self.version
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._stat:
+            return self.version
+
+        try:
+            img = Image.open(self.path)
+            img.load()
+        except (OSError, SyntaxError):
+            # the file is still being written, keep the previous frame and retry next time
+            return self.version
+
+        self._stat = key
+        self.publish(img)
+        return self.version
+
+    def publish(self, img):
+        """
+        replace the frame by a PIL image
+        """
+        self.image = img
+        self._encoded = {}
+        self._text = None
+        self._binary = {}
+        self._delta_messages = {}
+        self._keyframes = {}
+        self.version += 1
+
+    def encoded(self, codec='png'):
+        """
+        :return: (bytes) the current frame encoded with `codec`
+        """
+        if codec not in self._encoded:
+            self._encoded[codec] = encode_image(self.image, codec, self.quality)
+        return self._encoded[codec]
+
+    def text(self):
+        """
+        :return: (str) the current frame as base64 PNG, None before the first frame
+        """
+        self.refresh()
+        if self.image is None:
+            return None
+        if self._text is None:
+            self._text = base64.b64encode(self.encoded('png')).decode('utf-8')
+        return self._text
+
+    def binary(self, codec='png'):
+        """
+        :return: (bytes) the current frame as a binary message, None before the first frame
+        """
+        self.refresh()
+        if self.image is None:
+            return None
+        if codec not in self._binary:
+            width, height = self.image.size
+            self._binary[codec] = pack_frame(self.version, width, height, codec,
+                                             self.encoded(codec))
+        return self._binary[codec]
+
+    def delta(self, codec='png', keyframe=False):
+        """
+        :param keyframe: (bool) send the whole frame whatever changed
+        :return: (bytes) the tiles changed since the previous frame sent in
+            delta mode as a delta message, None before the first frame
+        """
+        self.refresh()
+        if self.image is None:
+            return None
+
+        # keyframes too become the frame the next delta applies to
+        if self._delta_version != self.version:
+            img = self.image
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            self._delta.update(np.asarray(img), self.version)
+            self._delta_version = self.version
+
+        width, height = self.image.size
+        if keyframe or self._delta.is_keyframe:
+            if codec not in self._keyframes:
+                self._keyframes[codec] = pack_delta(self.version, self.version, width, height,
+                                                    codec, self.tile_size, [],
+                                                    self.encoded(codec), flags=KEYFRAME)
+            return self._keyframes[codec]
+
+        if codec not in self._delta_messages:
+            self._delta_messages[codec] = self._delta.encode(width, height, codec, self.quality)
+        return self._delta_messages[codec]
+
+    def message(self, codec=TEXT_MODE, keyframe=False):
+        """
+        :param keyframe: (bool) in delta mode, send the whole frame
+        :return: the current frame as base64 text, as a binary message when
+            the client asked for a codec, or as a delta message
+        """
+        if codec is TEXT_MODE:
+            return self.text()
+        if codec.startswith(DELTA_PREFIX):
+            return self.delta(codec[len(DELTA_PREFIX):], keyframe)
+        return self.binary(codec)
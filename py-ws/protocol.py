@@ -0,0 +1,87 @@
+import io
+import struct
+
+
+# Binary frames are a header followed by the encoded image:
+# frame id (uint32), width (uint16), height (uint16), codec (uint8), big endian
+HEADER = struct.Struct('!IHHB')
+
+# codec name -> (id in the header, PIL format)
+CODECS = {
+    'png': (1, 'PNG'),
+    'jpeg': (2, 'JPEG'),
+    'webp': (3, 'WEBP'),
+}
+
+# Delta frames follow the binary header with the id of the frame they apply to (uint32),
+# flags (uint8), the tile size in pixels (uint16) and the number of tiles (uint16),
+# then the column and row (uint16, uint16) of every tile, then the tiles packed
+# row by row into one encoded image as wide as the frame
+DELTA_HEADER = struct.Struct('!IBHH')
+TILE = struct.Struct('!HH')
+# the image is the whole frame, not tiles
+KEYFRAME = 1
+
+# Clients that never send a mode message get base64 text frames
+TEXT_MODE = None
+# Codec of the clients in delta mode, followed by the codec of the tiles
+DELTA_PREFIX = 'delta:'
+
+
+def encode_image(img, codec, quality=80):
+    """
+    :param img: (PIL.Image) image to encode
+    :param quality: (int) quality of the lossy codecs (jpeg, webp)
+    :return: (bytes) `img` encoded with `codec`
+    """
+    if codec == 'jpeg' and img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    buffered = io.BytesIO()
+    if codec == 'png':
+        img.save(buffered, format=CODECS[codec][1])
+    else:
+        img.save(buffered, format=CODECS[codec][1], quality=quality)
+    return buffered.getvalue()
+
+
+def pack_frame(frame_id, width, height, codec, data):
+    """
+    :return: (bytes) header and encoded image of a binary frame
+    """
+    return HEADER.pack(frame_id & 0xFFFFFFFF, width, height, CODECS[codec][0]) + data
+
+
+def pack_delta(frame_id, base_id, width, height, codec, tile_size, tiles, data, flags=0):
+    """
+    :param tiles: (list) (column, row) of the changed tiles, in the order they are packed in `data`
+    :return: (bytes) headers, tile coordinates and encoded image of a delta frame
+    """
+    header = HEADER.pack(frame_id & 0xFFFFFFFF, width, height, CODECS[codec][0])
+    header += DELTA_HEADER.pack(base_id & 0xFFFFFFFF, flags, tile_size, len(tiles))
+    return header + b''.join(TILE.pack(column, row) for column, row in tiles) + data
+
+
+def parse_mode(message):
+    """
+    Read a mode negotiation message, 'mode:text', 'mode:binary[:<codec>]'
+    or 'mode:delta[:<codec>]'
+
+    :return: (bool, str) whether the message is a mode message, and the
+        codec of binary frames, DELTA_PREFIX + codec of delta frames or TEXT_MODE
+    """
+    if not message.startswith('mode:'):
+        return False, TEXT_MODE
+
+    parts = message.split(':')
+    if parts[1] in ('binary', 'delta'):
+        codec = parts[2] if len(parts) > 2 else 'png'
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec {codec}, expected one of {list(CODECS)}")
+        if parts[1] == 'delta':
+            return True, DELTA_PREFIX + codec
+        return True, codec
+    if parts[1] == 'text':
+        return True, TEXT_MODE
+
+    raise ValueError(f"unknown mode {message}")
@@ -1,66 +1,132 @@
 import os
 import asyncio
 import websockets
-from PIL import Image
-import io
-import base64
+
+from broadcast import Broadcaster
+from frame_cache import FrameCache
+from protocol import TEXT_MODE, parse_mode
 
 
 CURRENT_DIR = os.path.dirname(os.path.realpath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(CURRENT_DIR), 'data')
- 
+
 # Server data
 PORT = 5174
-print("Server listening on Port " + str(PORT))
+# Highest rate frames are pushed to the subscribed clients
+MAX_FPS = float(os.environ.get('MAX_FPS', 30))
 
 # A set of connected ws clients
 connected = set()
 
-# The main behavior function for this server
-async def echo(websocket, path):
-    print("A client just connected")
-    # Store a copy of the connected client
-    connected.add(websocket)
-    # Handle incoming messages
-    try:
-        async for message in websocket:
-
-            if message == 'render':
-
-                # img_arr = np.load(os.path.join(DATA_DIR, 'pybullet.npy'))
-                # img = Image.fromarray(img_arr, 'RGBA')
-
-                # # Convert the Image object to a byte array
-                # img_bytes = io.BytesIO()
-                # img.save(img_bytes, format='PNG')
-                # img_bytes = img_bytes.getvalue()
-
-                # # Encode the byte array as base64
-                # img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-
-                img = Image.open(os.path.join(DATA_DIR, 'pybullet.png'))
-
-                buffered = io.BytesIO()
-                img.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-                await websocket.send(img_str)
-            else:
-                print("Received message from client: " + message)
-                # Send a response to all connected clients except sender
-
-                # # Send a response to all connected clients except sender
-                # for conn in connected:
-                #     if conn != websocket:
-                #         await conn.send("Someone said: " + message)
-
-    # Handle disconnecting clients 
-    except websockets.exceptions.ConnectionClosed as e:
-        print("A client just disconnected")
-    finally:
-        connected.remove(websocket)
-
-# Start the server
-start_server = websockets.serve(echo, "0.0.0.0", PORT)
-asyncio.get_event_loop().run_until_complete(start_server)
-asyncio.get_event_loop().run_forever()
+
+def make_handler(frame_cache, broadcaster):
+    """
+    :param frame_cache: (FrameCache) the latest frame, encoded once and shared by all the clients
+    :param broadcaster: (Broadcaster) pushes every new frame to the clients that sent 'subscribe'
+    :return: the main behavior function of the server
+    """
+
+    async def echo(websocket, path):
+        print("A client just connected")
+        # Store a copy of the connected client
+        connected.add(websocket)
+        # Text frames until the client negotiates binary ones with 'mode:binary:<codec>'
+        # or delta ones with 'mode:delta:<codec>'
+        codec = TEXT_MODE
+        # Handle incoming messages
+        try:
+            async for message in websocket:
+
+                # frames only go to the client, its commands are all text
+                if isinstance(message, bytes):
+                    await websocket.send("error:binary messages are not accepted")
+                    continue
+
+                try:
+                    is_mode, mode_codec = parse_mode(message)
+                except ValueError as e:
+                    # only clients that negotiate a mode can get here, old text clients never do
+                    await websocket.send("error:" + str(e))
+                    continue
+
+                if is_mode:
+                    codec = mode_codec
+                    if websocket in broadcaster.subscribers:
+                        broadcaster.subscribe(websocket, codec)
+                    # confirm the mode so the client knows how the frames will come
+                    await websocket.send(message)
+
+                elif message == 'subscribe':
+                    # push the frames from now on instead of answering 'render'
+                    broadcaster.subscribe(websocket, codec)
+
+                elif message == 'unsubscribe':
+                    broadcaster.unsubscribe(websocket)
+
+                elif message == 'keyframe':
+                    # a delta client missed a frame, send it the whole one
+                    if websocket in broadcaster.subscribers:
+                        broadcaster.resync(websocket)
+                    else:
+                        frame = frame_cache.message(codec, keyframe=True)
+                        if frame is not None:
+                            await websocket.send(frame)
+
+                elif message == 'render':
+
+                    # img_arr = np.load(os.path.join(DATA_DIR, 'pybullet.npy'))
+                    # img = Image.fromarray(img_arr, 'RGBA')
+
+                    # # Convert the Image object to a byte array
+                    # img_bytes = io.BytesIO()
+                    # img.save(img_bytes, format='PNG')
+                    # img_bytes = img_bytes.getvalue()
+
+                    # # Encode the byte array as base64
+                    # img_base64 = base64.b64encode(img_bytes).decode('utf-8')
+
+                    frame = frame_cache.message(codec)
+
+                    if frame is not None:
+                        await websocket.send(frame)
+                else:
+                    print("Received message from client: " + message)
+                    # Send a response to all connected clients except sender
+
+                    # # Send a response to all connected clients except sender
+                    # for conn in connected:
+                    #     if conn != websocket:
+                    #         await conn.send("Someone said: " + message)
+
+        # Handle disconnecting clients
+        except websockets.exceptions.ConnectionClosed as e:
+            print("A client just disconnected")
+        finally:
+            broadcaster.unsubscribe(websocket)
+            connected.remove(websocket)
+
+    return echo
+
+
+def serve(frame_cache, port=PORT, max_fps=MAX_FPS, broadcaster=None, tasks=()):
+    """
+    serve the frames of `frame_cache` until the process is stopped
+    :param broadcaster: (Broadcaster) pushing the frames, one at `max_fps` by default
+    :param tasks: (list) coroutines run alongside the server
+    """
+    if broadcaster is None:
+        broadcaster = Broadcaster(frame_cache, frame_cache.message, max_fps)
+
+    # Start the server
+    start_server = websockets.serve(make_handler(frame_cache, broadcaster), "0.0.0.0", port)
+    print("Server listening on Port " + str(port))
+    asyncio.get_event_loop().run_until_complete(start_server)
+    asyncio.get_event_loop().create_task(broadcaster.run())
+    for task in tasks:
+        asyncio.get_event_loop().create_task(task)
+    asyncio.get_event_loop().run_forever()
+
+
+if __name__ == "__main__":
+    # The frames written to disk by pybullet/server.py
+    serve(FrameCache(os.path.join(DATA_DIR, 'pybullet.png')))
@@ -0,0 +1,58 @@
+"""
+Streaming service running the PyBullet simulation in the server process.
+
+The simulation is stepped by a worker thread and its camera images are
+handed to the WebSocket clients from memory, without pybullet/server.py
+and the data/pybullet.png file in between.
+Unless --no-adaptive is given, the resolution, shadows and encoder
+quality are scaled to hold --fps whatever the number of viewers.
+
+    python sim_server.py --width 320 --height 200 --fps 30
+"""
+import argparse
+
+from adaptive import LEVELS, AdaptiveController
+from broadcast import Broadcaster
+from server import MAX_FPS, PORT, serve
+from simulation import SharedFrames, Simulation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=320,
+                        help="capture width when not adaptive")
+    parser.add_argument("--height", type=int, default=200,
+                        help="capture height when not adaptive")
+    parser.add_argument("--hz", type=int, default=240,
+                        help="simulation steps per second")
+    parser.add_argument("--fps", type=int, default=30,
+                        help="camera images per second")
+    parser.add_argument("--max-fps", type=float, default=MAX_FPS,
+                        help="highest rate frames are pushed to the subscribed clients")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=True,
+                        help="scale the capture and encoding to hold --fps")
+    parser.add_argument("--level", type=int, default=2,
+                        help=f"adaptive level to start at, 0 (best) to {len(LEVELS) - 1}")
+    args = parser.parse_args()
+
+    frames = SharedFrames(args.width, args.height)
+    simulation = Simulation(frames, args.hz, args.fps)
+    broadcaster = Broadcaster(frames, frames.message, args.max_fps)
+
+    tasks = []
+    if args.adaptive:
+        controller = AdaptiveController(simulation, frames, broadcaster,
+                                        min(args.fps, args.max_fps), args.level)
+        tasks.append(controller.run())
+
+    simulation.start()
+    try:
+        serve(frames, args.port, broadcaster=broadcaster, tasks=tasks)
+    finally:
+        simulation.close()
+
+
+if __name__ == "__main__":
+    main()
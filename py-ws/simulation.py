@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pybullet as p
+from PIL import Image
+
+from broadcast import SMOOTHING
+from frame_cache import FrameCache
+
+CURRENT_DIR = os.path.dirname(os.path.realpath(__file__))
+URDF_DIR = os.path.join(os.path.dirname(CURRENT_DIR), 'pybullet', 'urdf')
+
+
+class SharedFrames(FrameCache):
+    """
+    Frames captured by a thread straight into numpy buffers, no file in between.
+
+    Three buffers are rotated: the producer thread writes `back`, hands
+    it over with `swap` and the server thread picks the latest one up in
+    `refresh`. The published image is a view of its buffer, which the
+    producer never writes again until a newer frame replaced it.
+
+    :param width: (int) width of the frames
+    :param height: (int) height of the frames
+    :param quality: (int) quality of the lossy codecs (jpeg, webp)
+    """
+
+    def __init__(self, width, height, quality=80):
+        super().__init__(None, quality)
+        self.buffers = np.zeros((3, height, width, 4), dtype=np.uint8)
+        self._front, self._ready, self._back = 0, 1, 2
+        self._fresh = False
+        self._lock = threading.Lock()
+
+    @property
+    def back(self):
+        """
+        buffer of the next frame, only written by the producer thread
+        """
+        return self.buffers[self._back]
+
+    def resize(self, width, height):
+        """
+        called by the producer before writing frames of another size, the
+        published image keeps its own buffer alive
+        """
+        with self._lock:
+            self.buffers = np.zeros((3, height, width, 4), dtype=np.uint8)
+            self._fresh = False
+
+    def swap(self):
+        """
+        called by the producer once `back` holds a whole frame
+        """
+        with self._lock:
+            self._back, self._ready = self._ready, self._back
+            self._fresh = True
+
+    def refresh(self):
+        """
+        publish the latest frame swapped in by the producer
+        :return: (int) version of the current frame
+        """
+        with self._lock:
+            if not self._fresh:
+                return self.version
+            self._front, self._ready = self._ready, self._front
+            self._fresh = False
+            front = self.buffers[self._front]
+
+        height, width = front.shape[:2]
+        self.publish(Image.frombuffer('RGBA', (width, height), front, 'raw', 'RGBA', 0, 1))
+        return self.version
+
+
+class Simulation:
+    """
+    The arm and plane scene of pybullet/server.py on a DIRECT client,
+    stepped in real time by a worker thread that captures a camera
+    image into `frames` every `1 / fps` seconds.
+
+    :param frames: (SharedFrames) where the camera images are written
+    :param hz: (int) simulation steps per second
+    :param fps: (int) camera images per second
+    """
+
+    def __init__(self, frames, hz=240, fps=30):
+        self.frames = frames
+        self.hz = hz
+        self.steps_per_frame = max(round(hz / fps), 1)
+        # frames captured so far, and moving average of the time to capture one
+        self.captured = 0
+        self.capture_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.client = p.connect(p.DIRECT)
+        p.setTimeStep(1 / hz, physicsClientId=self.client)
+
+        self.arm = p.loadURDF(fileName=os.path.join(URDF_DIR, 'simplearm.urdf'),
+                              basePosition=[0, 0, 0.1],
+                              physicsClientId=self.client)
+        self.plane = p.loadURDF(fileName=os.path.join(URDF_DIR, 'simpleplane.urdf'),
+                                basePosition=[0, 0, -0.1],
+                                physicsClientId=self.client)
+
+        _, orientation = p.getBasePositionAndOrientation(self.arm, physicsClientId=self.client)
+        p.resetBasePositionAndOrientation(self.arm, (0, 0, 1), orientation,
+                                          physicsClientId=self.client)
+
+        # width, height and shadows of the next captures, replaced as a whole by `configure`
+        height, width = frames.back.shape[:2]
+        self.camera = (width, height, True)
+
+        # the camera does not move, compute its matrices once
+        self.view_matrix = p.computeViewMatrixFromYawPitchRoll(
+            cameraTargetPosition=[0, 0, 0],
+            distance=3,
+            yaw=45,
+            pitch=-30,
+            roll=0,
+            upAxisIndex=2,
+        )
+        self.projection_matrix = self._projection_matrix(width, height)
+
+    @staticmethod
+    def _projection_matrix(width, height):
+        return p.computeProjectionMatrixFOV(
+            fov=60,
+            aspect=width / height,
+            nearVal=0.01,
+            farVal=100,
+        )
+
+    def configure(self, width, height, shadow):
+        """
+        change the camera from the next capture, can be called from any thread
+        """
+        self.camera = (width, height, shadow)
+
+    def capture(self):
+        """
+        render the camera into the back buffer of `frames` and hand it over
+        """
+        start = time.perf_counter()
+        width, height, shadow = self.camera
+
+        back = self.frames.back
+        if back.shape[:2] != (height, width):
+            self.frames.resize(width, height)
+            back = self.frames.back
+            self.projection_matrix = self._projection_matrix(width, height)
+
+        _, _, rgb_pixels, _, _ = p.getCameraImage(
+            width,
+            height,
+            viewMatrix=self.view_matrix,
+            projectionMatrix=self.projection_matrix,
+            shadow=shadow,
+            lightDirection=[1, 1, 1],
+            physicsClientId=self.client,
+        )
+
+        back[:] = np.reshape(np.asarray(rgb_pixels, dtype=np.uint8), back.shape)
+        self.frames.swap()
+
+        elapsed = time.perf_counter() - start
+        self.capture_seconds += SMOOTHING * (elapsed - self.capture_seconds)
+        self.captured += 1
+
+    def _run(self):
+        dt = 1 / self.hz
+        next_step = time.perf_counter()
+        step = 0
+
+        while not self._stop.is_set():
+            p.stepSimulation(physicsClientId=self.client)
+            if step % self.steps_per_frame == 0:
+                self.capture()
+            step += 1
+
+            # schedule from the previous deadline so the sleeps do not drift
+            next_step += dt
+            delay = next_step - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # too slow for real time, do not try to catch up
+                next_step = time.perf_counter()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        p.disconnect(physicsClientId=self.client)
@@ -1,10 +1,12 @@
 import os
 import math
-import time
 
 import pybullet as p
 import pybullet_data
 
+from ik import IKSolver
+from sim_runner import SimulationRunner, parse_runner_args
+
 PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
@@ -49,15 +51,26 @@ jointPositions = [0 for _ in jointIndices]
 # Duration of one cycle (in seconds)
 cycleDuration = 2.0
 
-# Amount of time to sleep each step
+# Simulated time of each step
 timeStep = 1. / 240.
 
-zahlen = 0
 targetPos = [0.5, 0.2, 0.3]
 
-while True:
+# You need to know the index of the end effector link. Let's say it's the last link
+endEffectorLinkIndex = 0
+
+# The target does not move, calculate the inverse kinematics once
+ik_solver = IKSolver(arm_urdf, base_position=[0.5, 0, 0.15], end_effector=endEffectorLinkIndex)
+jointPoses = ik_solver.solve([targetPos])[0]
+
+print(jointPoses)
+
+# Step the simulation at a fixed timestep, see sim_runner.py for the modes
+runner = SimulationRunner(client_id, time_step=timeStep, **parse_runner_args())
+ticksPerCycle = int(cycleDuration / (timeStep * runner.substeps))
 
-    zahlen += 1
+
+def control(zahlen):
 
     # for i in range(len(jointIndices)):
     # for i in range(1):
@@ -68,20 +81,13 @@ while True:
 
         # print(jointPositions[i])
 
-        # You need to know the index of the end effector link. Let's say it's the last link
-        endEffectorLinkIndex = i
-
-        # Calculate the inverse kinematics
-        jointPoses = p.calculateInverseKinematics(
-            arm_id, endEffectorLinkIndex, targetPos)
-
-        print(jointPoses)
-
-        cartesian_pos, cartesian_orientation = p.getLinkState(
-            arm_id, i, physicsClientId=client_id)[:2]
+        # Print the end effector position once per cycle, not every step
+        if zahlen % ticksPerCycle == 0:
+            cartesian_pos, cartesian_orientation = p.getLinkState(
+                arm_id, i, physicsClientId=client_id)[:2]
 
-        print(cartesian_pos)
-        # print(cartesian_orientation)
+            print(cartesian_pos)
+            # print(cartesian_orientation)
 
         # Set the new joint position
         # p.setJointMotorControl2(
@@ -92,8 +98,5 @@ while True:
     # p.resetDebugVisualizerCamera(
     #     cameraDistance, cameraYaw, cameraPitch, [0, 0, 0])
 
-    # Step the simulation
-    p.stepSimulation(physicsClientId=client_id)
 
-    # Sleep for a bit
-    time.sleep(timeStep)
+runner.run(control)
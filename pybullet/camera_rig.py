@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pybullet as p
+
+
+@dataclass(frozen=True)
+class CameraPose:
+    target: tuple = (0, 0, 0)
+    distance: float = 3
+    yaw: float = 45
+    pitch: float = -30
+    roll: float = 0
+    fov: float = 60
+    near: float = 0.01
+    far: float = 100
+
+
+class CameraRig:
+    """
+    Several cameras looking at one scene, captured together into preallocated arrays.
+
+    The view and projection matrices of a camera are computed once and
+    kept until its pose changes. Every capture writes into the same
+    (N, H, W, 4) RGBA array, `rgb`, `depth` and `segmentation` are views
+    of the rig buffers, so reading them allocates nothing.
+
+    :param poses: (list) CameraPose of every camera
+    :param width: (int) width of the images
+    :param height: (int) height of the images
+    :param client_id: (int) physics client rendering the images
+    :param shadow: (bool) render the shadows
+    :param segmentation: (bool) also capture the segmentation masks
+    :param renderer: (int) p.ER_TINY_RENDERER or p.ER_BULLET_HARDWARE_OPENGL, pybullet's default if None
+    :param bullet: (module) pybullet or a BulletClient rendering the images, pybullet if None
+    """
+
+    def __init__(self, poses, width, height, client_id=None, shadow=True, segmentation=True,
+                 renderer=None, bullet=None):
+        self.width = width
+        self.height = height
+        self.client_id = client_id
+        self.bullet = p if bullet is None else bullet
+        # a BulletClient passes its own client id
+        self._client_kwargs = {} if client_id is None else {"physicsClientId": client_id}
+        self.shadow = shadow
+        self.segmentation_enabled = segmentation
+        self.renderer = renderer
+
+        self.poses = list(poses)
+        self._view_matrices = [None] * len(self.poses)
+        self._projection_matrices = [None] * len(self.poses)
+
+        n = len(self.poses)
+        self.rgba = np.zeros((n, height, width, 4), dtype=np.uint8)
+        self.depth = np.zeros((n, height, width), dtype=np.float32)
+        self.segmentation = np.zeros((n, height, width), dtype=np.int32)
+        self.rgb = self.rgba[..., :3]
+
+    def __len__(self):
+        return len(self.poses)
+
+    def set_pose(self, i, pose):
+        """
+        move camera `i`, its matrices are computed again only if the pose changed
+        """
+        if pose != self.poses[i]:
+            self.poses[i] = pose
+            self._view_matrices[i] = None
+            self._projection_matrices[i] = None
+
+    def view_matrix(self, i):
+        if self._view_matrices[i] is None:
+            pose = self.poses[i]
+            self._view_matrices[i] = self.bullet.computeViewMatrixFromYawPitchRoll(
+                cameraTargetPosition=pose.target,
+                distance=pose.distance,
+                yaw=pose.yaw,
+                pitch=pose.pitch,
+                roll=pose.roll,
+                upAxisIndex=2,
+                **self._client_kwargs,
+            )
+        return self._view_matrices[i]
+
+    def projection_matrix(self, i):
+        if self._projection_matrices[i] is None:
+            pose = self.poses[i]
+            self._projection_matrices[i] = self.bullet.computeProjectionMatrixFOV(
+                fov=pose.fov,
+                aspect=self.width / self.height,
+                nearVal=pose.near,
+                farVal=pose.far,
+                **self._client_kwargs,
+            )
+        return self._projection_matrices[i]
+
+    def capture(self, indices=None):
+        """
+        render the cameras into the rig buffers
+        :param indices: (list) cameras to render, all of them if None
+        :return: (np.ndarray, np.ndarray, np.ndarray) views of the RGB (N, H, W, 3),
+            depth (N, H, W) and segmentation (N, H, W) buffers
+        """
+        kwargs = {"shadow": self.shadow, "lightDirection": [1, 1, 1], **self._client_kwargs}
+        if self.renderer is not None:
+            kwargs["renderer"] = self.renderer
+        if not self.segmentation_enabled:
+            kwargs["flags"] = p.ER_NO_SEGMENTATION_MASK
+
+        for i in range(len(self.poses)) if indices is None else indices:
+            _, _, rgba, depth, segmentation = self.bullet.getCameraImage(
+                self.width,
+                self.height,
+                viewMatrix=self.view_matrix(i),
+                projectionMatrix=self.projection_matrix(i),
+                **kwargs,
+            )
+
+            # numpy-enabled builds return arrays, the others flat tuples
+            self.rgba[i] = np.reshape(rgba, (self.height, self.width, 4))
+            self.depth[i] = np.reshape(depth, (self.height, self.width))
+            if self.segmentation_enabled:
+                self.segmentation[i] = np.reshape(segmentation, (self.height, self.width))
+
+        return self.rgb, self.depth, self.segmentation
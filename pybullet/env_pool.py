@@ -0,0 +1,35 @@
+import os
+import sys
+from functools import partial
+
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+# the process and shared memory plumbing is the one of the snake training, in rl/
+RL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "rl")
+if RL_DIR not in sys.path:
+    sys.path.append(RL_DIR)
+
+from shm_vec_env import ShmVecEnv  # noqa: E402
+
+
+class EnvPool(ShmVecEnv):
+    """
+    Spreads `n_envs` PyBullet envs over `n_workers` processes, each env with
+    its own DIRECT physics client. A worker steps all its envs, in a
+    DummyVecEnv, for one message and exchanges the batch through shared
+    memory, so a step costs one round trip per worker, not per env.
+
+    With 'forkserver' and 'spawn' (the default) the training script must be
+    wrapped in an ``if __name__ == "__main__":`` block.
+
+    :param env_fn: (callable) builds one env, must be picklable
+    :param n_envs: (int) number of envs, i.e. physics clients
+    :param n_workers: (int) number of worker processes
+    :param start_method: (str) multiprocessing start method
+    """
+
+    def __init__(self, env_fn, n_envs, n_workers, start_method=None):
+        n_workers = min(n_workers, n_envs)
+        sizes = [(n_envs + i) // n_workers for i in range(n_workers)]
+        super().__init__([partial(DummyVecEnv, [env_fn] * size) for size in sizes],
+                         start_method=start_method)
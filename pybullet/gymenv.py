@@ -1,17 +1,45 @@
 
 import math
 import os
+from functools import partial
+
 import pybullet as p
+import pybullet_data
 import numpy as np
 import gymnasium as gym
 
+from joint_io import JointIO
+
 
 PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
+def restore_state(client, state_id, bodies):
+    """
+    restore a state saved with p.saveState as if the client had just been built
+
+    p.restoreState brings back the positions and velocities but keeps the
+    contact manifolds, whose cached points change the next steps, so an
+    episode would depend on the one before. Moving the bodies away from
+    everything and running the collision detection drops the manifolds
+    before the state is restored. The client must also order its
+    overlapping pairs deterministically, see `setPhysicsEngineParameter`.
+    :param client: (int) physics client
+    :param state_id: (int) id returned by p.saveState
+    :param bodies: (list) every body that is not static
+    """
+    for i, body in enumerate(bodies):
+        p.resetBasePositionAndOrientation(body, [1000 * (i + 1)] * 3, [0, 0, 0, 1],
+                                          physicsClientId=client)
+    p.performCollisionDetection(physicsClientId=client)
+    p.restoreState(state_id, physicsClientId=client)
+
+
 class Car:
-    def __init__(self, client):
+    def __init__(self, client, dt=1/30):
         self.client = client
+        # seconds between two actions
+        self.dt = dt
         f_name = os.path.join(PROJECT_DIR, "urdf", "simplecar.urdf")
         self.car = p.loadURDF(fileName=f_name,
                               basePosition=[0, 0, 0.1],
@@ -27,10 +55,20 @@ class Car:
         self.c_drag = 0.01
         # Throttle constant increases "speed" of the car
         self.c_throttle = 20
+        # Last commands sent to the motors, which hold them until told otherwise
+        self.steering_command = None
+        self.speed_command = None
 
     def get_ids(self):
         return self.car, self.client
 
+    def reset(self):
+        # the joint states come back with the saved physics state, only our own speed remains
+        self.joint_speed = 0
+        # the motors may hold targets of the last episode, command them again
+        self.steering_command = None
+        self.speed_command = None
+
     def apply_action(self, action):
         # Expects action to be two dimensional
         throttle, steering_angle = action
@@ -39,39 +77,45 @@ class Car:
         throttle = min(max(throttle, 0), 1)
         steering_angle = max(min(steering_angle, 0.6), -0.6)
 
-        # Set the steering joint positions
-        p.setJointMotorControlArray(self.car, self.steering_joints,
-                                    controlMode=p.POSITION_CONTROL,
-                                    targetPositions=[steering_angle] * 2,
-                                    physicsClientId=self.client)
+        # Set the steering joint positions, when they change
+        if steering_angle != self.steering_command:
+            p.setJointMotorControlArray(self.car, self.steering_joints,
+                                        controlMode=p.POSITION_CONTROL,
+                                        targetPositions=[steering_angle] * 2,
+                                        physicsClientId=self.client)
+            self.steering_command = steering_angle
 
         # Calculate drag / mechanical resistance ourselves
         # Using velocity control, as torque control requires precise models
         friction = -self.joint_speed * (self.joint_speed * self.c_drag +
                                         self.c_rolling)
         acceleration = self.c_throttle * throttle + friction
-        # Each time step is 1/240 of a second
-        self.joint_speed = self.joint_speed + 1/30 * acceleration
+        # Integrated once per action, dt seconds apart
+        self.joint_speed = self.joint_speed + self.dt * acceleration
         if self.joint_speed < 0:
             self.joint_speed = 0
 
-        # Set the velocity of the wheel joints directly
-        p.setJointMotorControlArray(
-            bodyUniqueId=self.car,
-            jointIndices=self.drive_joints,
-            controlMode=p.VELOCITY_CONTROL,
-            targetVelocities=[self.joint_speed] * 4,
-            forces=[1.2] * 4,
-            physicsClientId=self.client)
+        # Set the velocity of the wheel joints directly, when it changes:
+        # it stays at 0 when stopped and settles at top speed
+        if self.joint_speed != self.speed_command:
+            p.setJointMotorControlArray(
+                bodyUniqueId=self.car,
+                jointIndices=self.drive_joints,
+                controlMode=p.VELOCITY_CONTROL,
+                targetVelocities=[self.joint_speed] * 4,
+                forces=[1.2] * 4,
+                physicsClientId=self.client)
+            self.speed_command = self.joint_speed
 
     def get_observation(self):
         # Get the position and orientation of the car in the simulation
-        pos, ang = p.getBasePositionAndOrientation(self.car, self.client)
+        pos, ang = p.getBasePositionAndOrientation(self.car,
+                                                   physicsClientId=self.client)
         ang = p.getEulerFromQuaternion(ang)
         ori = (math.cos(ang[2]), math.sin(ang[2]))
         pos = pos[:2]
         # Get the velocity of the car
-        vel = p.getBaseVelocity(self.car, self.client)[0][0:2]
+        vel = p.getBaseVelocity(self.car, physicsClientId=self.client)[0][0:2]
 
         # Concatenate position, orientation, velocity
         observation = (pos + ori + vel)
@@ -81,11 +125,16 @@ class Car:
 
 class Goal:
     def __init__(self, client, base):
+        self.client = client
         f_name = os.path.join(PROJECT_DIR, "urdf", "simplegoal.urdf")
         self.goal_id = p.loadURDF(fileName=f_name,
                                   basePosition=[base[0], base[1], 0],
                                   physicsClientId=client)
 
+    def move(self, base):
+        p.resetBasePositionAndOrientation(self.goal_id, [base[0], base[1], 0], [0, 0, 0, 1],
+                                          physicsClientId=self.client)
+
 
 class Plane:
     def __init__(self, client):
@@ -96,22 +145,46 @@ class Plane:
 
 
 class SimpleDrivingEnv(gym.Env):
+    """
+    Driving a car to a random goal on a plane.
+
+    Each action is applied for `frame_skip` control steps of 1/30 s, and
+    the rewards of the control steps are summed. A control step runs
+    `substeps` physics steps of 1/30 / `substeps` s, for a more accurate
+    simulation at the same policy rate.
+
+    :param frame_skip: (int) control steps per action
+    :param substeps: (int) physics steps per control step
+    """
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, frame_skip=1, substeps=1):
+        self.frame_skip = frame_skip
+        self.substeps = substeps
+
         self.action_space = gym.spaces.box.Box(
             low=np.array([0, -.6], dtype=np.float32),
             high=np.array([1, .6], dtype=np.float32))
         self.observation_space = gym.spaces.box.Box(
             low=np.array([-10, -10, -1, -1, -5, -5, -10, -10], dtype=np.float32),
             high=np.array([10, 10, 1, 1, 5, 5, 10, 10], dtype=np.float32))
-        self.np_random = np.random
 
+        # every call below passes physicsClientId, several envs can share a process
         self.client = p.connect(p.DIRECT)
-        # Reduce length of episodes for RL algorithms
-        p.setTimeStep(1/30, self.client)
+        # Reduce length of episodes for RL algorithms: one control step is 1/30 s
+        p.setTimeStep(1/30 / substeps, physicsClientId=self.client)
+        p.setGravity(0, 0, -10, physicsClientId=self.client)
+        # the order of the contact pairs must not depend on earlier episodes, see restore_state
+        p.setPhysicsEngineParameter(deterministicOverlappingPairs=1, physicsClientId=self.client)
+
+        # Load the plane, car and goal once, reset() restores this snapshot
+        # and moves the goal instead of reloading the URDFs.
+        # The goal waits off the track until the first reset
+        Plane(self.client)
+        self.car = Car(self.client, dt=1/30)
+        self.goal_object = Goal(self.client, (20, 20))
+        self.initial_state = p.saveState(physicsClientId=self.client)
 
-        self.car = None
         self.goal = None
         self.done = False
         self.prev_dist_to_goal = None
@@ -120,46 +193,52 @@ class SimpleDrivingEnv(gym.Env):
         self.reset()
 
     def step(self, action):
-        # Feed action to the car and get observation of car's state
-        self.car.apply_action(action)
-        p.stepSimulation()
-        car_ob = self.car.get_observation()
-
-        # Compute reward as L2 change in distance to goal
-        dist_to_goal = math.sqrt(((car_ob[0] - self.goal[0]) ** 2 +
-                                  (car_ob[1] - self.goal[1]) ** 2))
-        reward = max(self.prev_dist_to_goal - dist_to_goal, 0)
-        self.prev_dist_to_goal = dist_to_goal
-
-        # Done by running off boundaries
-        if (car_ob[0] >= 10 or car_ob[0] <= -10 or
-                car_ob[1] >= 10 or car_ob[1] <= -10):
-            self.done = True
-        # Done by reaching goal
-        elif dist_to_goal < 1:
-            self.done = True
-            reward = 50
+        reward = 0
+        for _ in range(self.frame_skip):
+            # Feed action to the car and get observation of car's state
+            self.car.apply_action(action)
+            for _ in range(self.substeps):
+                p.stepSimulation(physicsClientId=self.client)
+            car_ob = self.car.get_observation()
+
+            # Compute reward as L2 change in distance to goal
+            dist_to_goal = math.sqrt(((car_ob[0] - self.goal[0]) ** 2 +
+                                      (car_ob[1] - self.goal[1]) ** 2))
+            step_reward = max(self.prev_dist_to_goal - dist_to_goal, 0)
+            self.prev_dist_to_goal = dist_to_goal
+
+            # Done by running off boundaries
+            if (car_ob[0] >= 10 or car_ob[0] <= -10 or
+                    car_ob[1] >= 10 or car_ob[1] <= -10):
+                self.done = True
+            # Done by reaching goal
+            elif dist_to_goal < 1:
+                self.done = True
+                step_reward = 50
+
+            reward += step_reward
+            if self.done:
+                break
 
         ob = np.array(car_ob + self.goal, dtype=np.float32)
         return ob, reward, self.done, False, dict()
 
-    def reset(self, seed=None):
-        p.resetSimulation(self.client)
-        p.setGravity(0, 0, -10)
-        # Reload the plane and car
-        Plane(self.client)
-        self.car = Car(self.client)
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        # Put the plane and car back where they were loaded
+        restore_state(self.client, self.initial_state, [self.car.car, self.goal_object.goal_id])
+        self.car.reset()
 
         # Set the goal to a random target
-        x = (self.np_random.uniform(5, 9) if self.np_random.randint(2) else
-             self.np_random.uniform(-5, -9))
-        y = (self.np_random.uniform(5, 9) if self.np_random.randint(2) else
-             self.np_random.uniform(-5, -9))
+        x = (self.np_random.uniform(5, 9) if self.np_random.integers(2) else
+             self.np_random.uniform(-9, -5))
+        y = (self.np_random.uniform(5, 9) if self.np_random.integers(2) else
+             self.np_random.uniform(-9, -5))
         self.goal = (x, y)
         self.done = False
 
         # Visual element of the goal
-        Goal(self.client, self.goal)
+        self.goal_object.move(self.goal)
 
         # Get observation to return
         car_ob = self.car.get_observation()
@@ -197,4 +276,313 @@ class SimpleDrivingEnv(gym.Env):
         pass
 
     def close(self):
-        p.disconnect(self.client)
+        p.disconnect(physicsClientId=self.client)
+
+
+class SimpleDrivingPixelEnv(SimpleDrivingEnv):
+    """
+    SimpleDrivingEnv observed through the car's forward camera, for CNN policies.
+
+    The camera is rendered by the TinyRenderer with a projection matrix
+    computed once, only after the last of the `frame_skip` control steps
+    of an action, and written into a preallocated stack of the last
+    `frame_stack` images.
+    Observations are (height, width, 3 * frame_stack) uint8 arrays,
+    oldest image first.
+
+    :param width: (int) width of the camera images
+    :param height: (int) height of the camera images
+    :param frame_skip: (int) control steps per action, the rewards are summed
+    :param frame_stack: (int) number of consecutive images in an observation
+    :param substeps: (int) physics steps per control step
+    """
+
+    def __init__(self, width=84, height=84, frame_skip=4, frame_stack=4, substeps=1):
+        self.width = width
+        self.height = height
+        self.frame_stack = frame_stack
+        # (height, width, frame_stack, 3) so the observation is a reshape, not a concatenation
+        self.frames = np.zeros((height, width, frame_stack, 3), dtype=np.uint8)
+
+        # the camera keeps its lens, only its pose follows the car
+        self.projection_matrix = p.computeProjectionMatrixFOV(fov=80, aspect=width / height,
+                                                              nearVal=0.01, farVal=100)
+        super().__init__(frame_skip=frame_skip, substeps=substeps)
+
+        self.observation_space = gym.spaces.box.Box(
+            low=0, high=255, shape=(height, width, 3 * frame_stack), dtype=np.uint8)
+
+    def capture(self):
+        """
+        render the forward camera of the car as the newest image of the stack
+        """
+        car_id, client_id = self.car.get_ids()
+        pos, ori = p.getBasePositionAndOrientation(car_id, physicsClientId=client_id)
+        pos = (pos[0], pos[1], 0.2)
+
+        # columns of the rotation matrix: the car looks along x, its roof along z
+        rot = p.getMatrixFromQuaternion(ori)
+        target = (pos[0] + rot[0], pos[1] + rot[3], pos[2] + rot[6])
+        up = (rot[2], rot[5], rot[8])
+        view_matrix = p.computeViewMatrix(pos, target, up, physicsClientId=client_id)
+
+        _, _, rgba, _, _ = p.getCameraImage(self.width, self.height,
+                                            viewMatrix=view_matrix,
+                                            projectionMatrix=self.projection_matrix,
+                                            renderer=p.ER_TINY_RENDERER,
+                                            flags=p.ER_NO_SEGMENTATION_MASK,
+                                            physicsClientId=client_id)
+
+        self.frames[:, :, :-1] = self.frames[:, :, 1:]
+        self.frames[:, :, -1] = np.reshape(rgba, (self.height, self.width, 4))[..., :3]
+
+    def _get_observation(self):
+        return self.frames.reshape(self.height, self.width, 3 * self.frame_stack).copy()
+
+    def step(self, action):
+        _, reward, terminated, truncated, info = super().step(action)
+
+        self.capture()
+        return self._get_observation(), reward, terminated, truncated, info
+
+    def reset(self, seed=None, options=None):
+        _, info = super().reset(seed=seed, options=options)
+
+        # no history yet, the first image fills the whole stack
+        self.capture()
+        self.frames[:] = self.frames[:, :, -1:]
+        return self._get_observation(), info
+
+    def render(self):
+        return self.frames[:, :, -1].copy()
+
+
+def rotation_vectors_to_quaternions(vectors, out):
+    """
+    :param vectors: (np.ndarray) axis times angle of every rotation, shape (m, 3)
+    :param out: (np.ndarray) written with the quaternions (x, y, z, w), shape (m, 4)
+    :return: (np.ndarray) out
+    """
+    half_angles = np.sqrt(np.einsum("ij,ij->i", vectors, vectors)) / 2
+    # sin(angle / 2) / angle, without dividing by 0 for a null rotation
+    out[:, :3] = vectors * (np.sinc(half_angles / np.pi) / 2)[:, None]
+    out[:, 3] = np.cos(half_angles)
+    return out
+
+
+class HumanoidEnv(gym.Env):
+    """
+    Walking forward with pybullet's humanoid.urdf, headless.
+
+    The actions are PD targets in [-1, 1] centred on the reset pose, where
+    every joint is at 0: an action of 0 holds that pose, -1 and 1 reach
+    the lower and upper limits of a revolute joint (a knee bends only one
+    way, so half of its range holds it straight), and a spherical joint
+    turns by the rotation vector of the action times `max_angle`. Each
+    action is held for `frame_skip` control steps of `substeps` physics
+    steps, and the rewards of the control steps are summed. The motors
+    are commanded once per action, and the state is read with JointIO
+    into preallocated buffers, so a step makes a fixed, small number of
+    pybullet calls whatever the number of joints. The reward is the
+    forward speed along x plus an alive bonus minus a control cost, and
+    the episode ends when the pelvis falls under `fall_height`.
+
+    :param time_step: (float) seconds of one physics step
+    :param substeps: (int) physics steps per control step
+    :param frame_skip: (int) control steps per action
+    :param max_force: (float) maximum force of the joint motors
+    :param max_angle: (float) rotation of a spherical joint at an action of 1
+    :param fall_height: (float) pelvis height under which the episode ends
+    :param max_episode_steps: (int) actions before the episode is truncated
+    :param reset_noise: (float) amplitude of the random joint offsets at reset
+    :param alive_bonus: (float) reward of every control step before the fall
+    :param control_cost: (float) weight of the squared norm of the action in the reward
+    """
+    metadata = {'render.modes': []}
+
+    URDF = os.path.join(PROJECT_DIR, "urdf", "humanoid.urdf")
+
+    def __init__(self, time_step=1/240, substeps=4, frame_skip=1, max_force=200.,
+                 max_angle=math.pi / 2, fall_height=0.5, max_episode_steps=1000,
+                 reset_noise=0.05, alive_bonus=1., control_cost=0.01):
+        self.time_step = time_step
+        self.substeps = substeps
+        self.frame_skip = frame_skip
+        self.max_force = max_force
+        self.max_angle = max_angle
+        self.fall_height = fall_height
+        self.max_episode_steps = max_episode_steps
+        self.reset_noise = reset_noise
+        self.alive_bonus = alive_bonus
+        self.control_cost = control_cost
+
+        # every call below passes physicsClientId, several envs can share a process
+        self.client = p.connect(p.DIRECT)
+        p.setTimeStep(time_step, physicsClientId=self.client)
+        p.setGravity(0, 0, -9.8, physicsClientId=self.client)
+        # the order of the contact pairs must not depend on earlier episodes, see restore_state
+        p.setPhysicsEngineParameter(deterministicOverlappingPairs=1, physicsClientId=self.client)
+
+        p.loadURDF(os.path.join(pybullet_data.getDataPath(), "plane.urdf"),
+                   physicsClientId=self.client)
+        # the model is y-up and 4 times human size, stand it up on z at scale
+        self.robot = p.loadURDF(fileName=self.URDF,
+                                basePosition=[0, 0, 0.9],
+                                baseOrientation=p.getQuaternionFromEuler([math.pi / 2, 0, 0]),
+                                globalScaling=0.25,
+                                physicsClientId=self.client)
+        # joint names, limits and indices are read once per URDF, see robot_model.py
+        self.joints = JointIO.from_urdf(self.URDF, self.robot, self.client)
+        self.initial_state = p.saveState(physicsClientId=self.client)
+
+        n, m = len(self.joints.single_dof), len(self.joints.spherical)
+        self.action_space = gym.spaces.box.Box(low=-1, high=1, shape=(n + 3 * m,),
+                                               dtype=np.float32)
+        # pelvis height, orientation, linear and angular velocity, then the joints
+        size = 11 + 2 * n + 7 * m
+        self.observation_space = gym.spaces.box.Box(low=-np.inf, high=np.inf, shape=(size,),
+                                                    dtype=np.float32)
+
+        # buffers reused by every step
+        self.observation = np.zeros(size, dtype=np.float32)
+        self.quaternions = np.zeros((m, 4))
+        # as the lists pybullet takes, they do not change between steps
+        self.forces = [float(max_force)] * n
+        self.spherical_forces = [[float(max_force)] * 3 for _ in range(m)]
+        # the reset pose, 0 within the limits, and the range on each side of it
+        self.rest = np.clip(0, self.joints.lower, self.joints.upper)
+        self.below = self.rest - self.joints.lower
+        self.above = self.joints.upper - self.rest
+
+        self.x = 0.
+        self.steps = 0
+
+    def _apply_action(self, action):
+        action = np.clip(action, -1, 1)
+        n = len(self.joints.single_dof)
+        single = action[:n]
+        targets = self.rest + single * np.where(single < 0, self.below, self.above)
+        rotation_vectors_to_quaternions(action[n:].reshape(-1, 3) * self.max_angle,
+                                        self.quaternions)
+        self.joints.set_positions(targets, self.quaternions,
+                                  forces=self.forces, spherical_forces=self.spherical_forces)
+        return float(np.dot(action, action))
+
+    def _get_observation(self):
+        joints = self.joints
+        joints.read()
+        pos, ori = p.getBasePositionAndOrientation(self.robot, physicsClientId=self.client)
+        linear, angular = p.getBaseVelocity(self.robot, physicsClientId=self.client)
+
+        n, m = len(joints.single_dof), len(joints.spherical)
+        ob = self.observation
+        ob[0] = pos[2]
+        ob[1:5] = ori
+        ob[5:8] = linear
+        ob[8:11] = angular
+        ob[11:11 + n] = joints.positions
+        ob[11 + n:11 + 2 * n] = joints.velocities
+        start = 11 + 2 * n
+        ob[start:start + 4 * m] = joints.spherical_positions.ravel()
+        ob[start + 4 * m:] = joints.spherical_velocities.ravel()
+
+    def step(self, action):
+        # the targets hold until the next command, set them once per action
+        cost = self.control_cost * self._apply_action(action)
+        dt = self.time_step * self.substeps
+
+        reward = 0.
+        terminated = False
+        for _ in range(self.frame_skip):
+            for _ in range(self.substeps):
+                p.stepSimulation(physicsClientId=self.client)
+            pos = p.getBasePositionAndOrientation(self.robot, physicsClientId=self.client)[0]
+
+            reward += (pos[0] - self.x) / dt + self.alive_bonus - cost
+            self.x = pos[0]
+            if pos[2] < self.fall_height:
+                terminated = True
+                break
+
+        self._get_observation()
+        self.steps += 1
+        truncated = not terminated and self.steps >= self.max_episode_steps
+        return self.observation.copy(), reward, terminated, truncated, dict()
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        # Put the plane and humanoid back where they were loaded
+        restore_state(self.client, self.initial_state, [self.robot])
+
+        joints = self.joints
+        n, m = len(joints.single_dof), len(joints.spherical)
+        positions = np.clip(self.rest + self.reset_noise * self.np_random.standard_normal(n),
+                            joints.lower, joints.upper)
+        rotation_vectors_to_quaternions(self.reset_noise * self.np_random.standard_normal((m, 3)),
+                                        self.quaternions)
+        joints.reset(positions, self.quaternions)
+
+        self._get_observation()
+        self.x = p.getBasePositionAndOrientation(self.robot, physicsClientId=self.client)[0][0]
+        self.steps = 0
+        return self.observation.copy(), {}
+
+    def render(self):
+        pass
+
+    def close(self):
+        p.disconnect(physicsClientId=self.client)
+
+
+def make_humanoid_pool(n_envs, n_workers=None, start_method=None, **kwargs):
+    """
+    HumanoidEnv stepped in parallel, `n_envs` of them over `n_workers` processes
+    :param kwargs: arguments of HumanoidEnv
+    :return: (EnvPool) a stable-baselines3 VecEnv
+    """
+    # stable-baselines3 is only needed for the vector form
+    from env_pool import EnvPool
+    return EnvPool(partial(HumanoidEnv, **kwargs), n_envs, n_workers or os.cpu_count(),
+                   start_method=start_method)
+
+
+def check_reproducible(env, actions, seed=0, n_episodes=3):
+    """
+    check that episodes run with the same seed and actions on one env, and on
+    a new one, give the same observations: a reset must not keep any state
+    :param env: (gym.Env) env to check, a new one is built from its class
+    :param actions: (np.ndarray) actions of an episode
+    :param seed: (int) seed of every reset
+    :param n_episodes: (int) episodes run on `env`
+    """
+    def episode(e):
+        observations = [e.reset(seed=seed)[0]]
+        for action in actions:
+            observation, _, terminated, truncated, _ = e.step(action)
+            observations.append(observation)
+            if terminated or truncated:
+                break
+        return np.array(observations)
+
+    fresh = type(env)()
+    expected = episode(fresh)
+    fresh.close()
+    for i in range(n_episodes):
+        observations = episode(env)
+        if observations.shape != expected.shape or not np.array_equal(observations, expected):
+            raise AssertionError(f"{type(env).__name__}: episode {i} with seed {seed} "
+                                 "differs from the episode of a new env")
+
+
+if __name__ == "__main__":
+    from gymnasium.utils.env_checker import check_env
+
+    rng = np.random.default_rng(0)
+    for env_class in (SimpleDrivingEnv, SimpleDrivingPixelEnv, HumanoidEnv):
+        env = env_class()
+        check_env(env, skip_render_check=True)
+        actions = rng.uniform(env.action_space.low, env.action_space.high,
+                              (100,) + env.action_space.shape).astype(np.float32)
+        check_reproducible(env, actions, seed=123)
+        env.close()
+        print(f"{env_class.__name__}: resets are reproducible")
@@ -1,11 +1,12 @@
 import os
 import math
-import time
 
 import pybullet as p
 import pybullet_data
 
 from pybullet_utils import display_joints_info
+from robot_model import RobotModel
+from sim_runner import SimulationRunner, parse_runner_args
 
 
 PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
@@ -26,7 +27,8 @@ p.setAdditionalSearchPath(pybullet_data.getDataPath())
 #                      physicsClientId=client_id)
 p.loadURDF("plane.urdf")
 
-robot = p.loadURDF(fileName=os.path.join(PROJECT_DIR, "urdf", "humanoid.urdf"),
+humanoid_urdf = os.path.join(PROJECT_DIR, "urdf", "humanoid.urdf")
+robot = p.loadURDF(fileName=humanoid_urdf,
                    basePosition=[0.5, 0.5, -0.1],
                    physicsClientId=client_id)
 
@@ -35,20 +37,22 @@ cameraDistance = 4.0
 cameraYaw = 0
 cameraPitch = -40
 
-# Amount of time to sleep each step
+# Simulated time of each step
 timeStep = 1. / 240.
 
 display_joints_info(robot, client_id=client_id)
 
-while True:
+# Joint names, limits and movable indices, read once per URDF and pickled next to it
+model = RobotModel.load(humanoid_urdf, robot, client_id)
+print(model)
 
-    # # Update the camera rotation
-    # cameraYaw += 0.1
-    # p.resetDebugVisualizerCamera(
-    #     cameraDistance, cameraYaw, cameraPitch, [0, 0, 0])
+runner = SimulationRunner(client_id, time_step=timeStep, **parse_runner_args())
 
-    # Step the simulation
-    p.stepSimulation(physicsClientId=client_id)
+# def control(tick):
+#     # Update the camera rotation
+#     cameraYaw += 0.1
+#     p.resetDebugVisualizerCamera(
+#         cameraDistance, cameraYaw, cameraPitch, [0, 0, 0])
 
-    # Sleep for a bit
-    time.sleep(timeStep)
+# Step the simulation at a fixed timestep, see sim_runner.py for the modes
+runner.run()
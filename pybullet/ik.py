@@ -0,0 +1,107 @@
+from collections import OrderedDict
+
+import numpy as np
+import pybullet as p
+
+
+class IKSolver:
+    """
+    Inverse kinematics of one robot for arrays of end effector targets.
+
+    The robot is loaded on its own DIRECT client, so queries never move
+    the robot of the simulation. Every query starts from the previous
+    solution, which is close to the next one along a trajectory (pybullet
+    takes no start for robots with spherical joints, those start from
+    their rest pose). Solutions are kept in an LRU cache keyed by the
+    target rounded to `decimals`, so a repeated target is not solved again.
+
+    :param urdf_path: (str) URDF of the robot
+    :param base_position: (tuple) base position of the robot in the simulation
+    :param base_orientation: (tuple) base orientation quaternion of the robot in the simulation
+    :param end_effector: (int) link index of the end effector, the last link if None
+    :param cache_size: (int) number of solutions kept
+    :param decimals: (int) decimals of the targets kept in the cache keys
+    :param max_iterations: (int) iterations of the pybullet solver
+    :param residual_threshold: (float) distance to the target at which the pybullet solver stops
+    """
+
+    def __init__(self, urdf_path, base_position=(0, 0, 0), base_orientation=(0, 0, 0, 1),
+                 end_effector=None, cache_size=4096, decimals=4, max_iterations=20,
+                 residual_threshold=1e-4):
+        self.client = p.connect(p.DIRECT)
+        self.robot = p.loadURDF(fileName=urdf_path,
+                                basePosition=base_position,
+                                baseOrientation=base_orientation,
+                                useFixedBase=True,
+                                physicsClientId=self.client)
+
+        n_joints = p.getNumJoints(self.robot, physicsClientId=self.client)
+        self.end_effector = n_joints - 1 if end_effector is None else end_effector
+        self.cache_size = cache_size
+        self.decimals = decimals
+        self.max_iterations = max_iterations
+        self.residual_threshold = residual_threshold
+
+        # warm start of the next query, one value per degree of freedom
+        self.n_dof = len(self._calculate((0, 0, 0), None, None))
+        self.previous = np.zeros(self.n_dof)
+        try:
+            self._calculate((0, 0, 0), None, self.previous.tolist())
+            self.warm_start = True
+        except p.error:
+            self.warm_start = False
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _calculate(self, target, orientation, current_positions):
+        kwargs = {}
+        if orientation is not None:
+            kwargs["targetOrientation"] = orientation
+        if current_positions is not None:
+            kwargs["currentPositions"] = current_positions
+        return p.calculateInverseKinematics(self.robot, self.end_effector, target,
+                                            maxNumIterations=self.max_iterations,
+                                            residualThreshold=self.residual_threshold,
+                                            physicsClientId=self.client, **kwargs)
+
+    def solve(self, targets, orientations=None):
+        """
+        :param targets: (np.ndarray) end effector positions, shape (n, 3)
+        :param orientations: (np.ndarray) end effector quaternions, shape (n, 4), free if None
+        :return: (np.ndarray) joint positions, shape (n, n_dof)
+        """
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+        if orientations is not None:
+            orientations = np.asarray(orientations, dtype=np.float64).reshape(-1, 4)
+
+        solutions = np.empty((len(targets), self.n_dof))
+        keys = np.round(targets, self.decimals)
+        if orientations is not None:
+            keys = np.concatenate([keys, np.round(orientations, self.decimals)], axis=1)
+
+        for i, key in enumerate(map(tuple, keys.tolist())):
+            solution = self._cache.get(key)
+            if solution is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                orientation = None if orientations is None else orientations[i].tolist()
+                previous = self.previous.tolist() if self.warm_start else None
+                solution = self._calculate(targets[i].tolist(), orientation, previous)
+                self._cache[key] = solution
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                self.misses += 1
+
+            solutions[i] = solution
+            self.previous[:] = solution
+
+        return solutions
+
+    def clear(self):
+        self._cache.clear()
+        self.previous[:] = 0
+
+    def close(self):
+        p.disconnect(physicsClientId=self.client)
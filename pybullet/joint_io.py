@@ -0,0 +1,161 @@
+import numpy as np
+import pybullet as p
+
+from robot_model import RobotModel
+
+
+def _as_list(values, n, size=None):
+    """
+    values as the lists pybullet takes, one per joint, a scalar is repeated
+    and a list is passed as it is
+    """
+    if isinstance(values, list):
+        return values
+    if np.ndim(values) == 0:
+        value = float(values)
+        return [value] * n if size is None else [[value] * size for _ in range(n)]
+    return np.asarray(values, dtype=np.float64).tolist()
+
+
+class JointIO:
+    """
+    Reads and commands all the movable joints of a body with array calls.
+
+    One p.getJointStates call reads the revolute and prismatic joints
+    and one p.getJointStatesMultiDof call the spherical ones, and one
+    array control call per kind writes their targets, instead of one call
+    per joint. The states are copied into arrays allocated once, ordered
+    as `single_dof` and `spherical`, which are reused by every read: copy
+    them to keep a state across steps.
+
+    :param body: (int) body to control
+    :param model: (RobotModel) model of the body, see robot_model.RobotModel.load
+    :param client_id: (int) physics client of the body
+    :param joints: (list) joint indices to control, all the movable ones if None
+    """
+
+    def __init__(self, body, model, client_id=None, joints=None):
+        self.body = body
+        self.model = model
+        self.client_id = client_id
+
+        joints = model.movable if joints is None else np.asarray(joints)
+        types = model.types[joints]
+        self.single_dof = joints[(types == p.JOINT_REVOLUTE) | (types == p.JOINT_PRISMATIC)]
+        self.spherical = joints[types == p.JOINT_SPHERICAL]
+        # passed to pybullet as lists, converted once
+        self._single_dof = self.single_dof.tolist()
+        self._spherical = self.spherical.tolist()
+
+        n, m = len(self.single_dof), len(self.spherical)
+        self.positions = np.zeros(n)
+        self.velocities = np.zeros(n)
+        self.torques = np.zeros(n)
+        # quaternions (x, y, z, w), angular velocities and torques
+        self.spherical_positions = np.zeros((m, 4))
+        self.spherical_velocities = np.zeros((m, 3))
+        self.spherical_torques = np.zeros((m, 3))
+
+        self.lower = model.lower[self.single_dof]
+        self.upper = model.upper[self.single_dof]
+        self.max_force = model.max_force[self.single_dof]
+
+    @classmethod
+    def from_urdf(cls, urdf_path, body, client_id=None, joints=None):
+        """
+        control a body loaded from `urdf_path`, with its cached RobotModel
+        """
+        return cls(body, RobotModel.load(urdf_path, body, client_id), client_id, joints)
+
+    def read(self):
+        """
+        read the state of every joint into the buffers
+        :return: (np.ndarray, np.ndarray) positions and velocities of the revolute
+            and prismatic joints
+        """
+        if self._single_dof:
+            states = p.getJointStates(self.body, self._single_dof, physicsClientId=self.client_id)
+            # one slice assignment per buffer, much cheaper than one per element
+            positions, velocities, _, torques = zip(*states)
+            self.positions[:] = positions
+            self.velocities[:] = velocities
+            self.torques[:] = torques
+
+        if self._spherical:
+            states = p.getJointStatesMultiDof(self.body, self._spherical,
+                                              physicsClientId=self.client_id)
+            positions, velocities, _, torques = zip(*states)
+            self.spherical_positions[:] = positions
+            self.spherical_velocities[:] = velocities
+            self.spherical_torques[:] = torques
+
+        return self.positions, self.velocities
+
+    def _command(self, mode, targets, spherical_targets, forces, spherical_forces, key):
+        kwargs = {"physicsClientId": self.client_id}
+        if targets is not None and self._single_dof:
+            n = len(self._single_dof)
+            single = {key: _as_list(targets, n)}
+            if forces is not None:
+                single["forces"] = _as_list(forces, n)
+            p.setJointMotorControlArray(self.body, self._single_dof, mode, **single, **kwargs)
+
+        if spherical_targets is not None and self._spherical:
+            m = len(self._spherical)
+            multi = {key: _as_list(spherical_targets, m)}
+            if spherical_forces is not None:
+                multi["forces"] = _as_list(spherical_forces, m, 3)
+            p.setJointMotorControlMultiDofArray(self.body, self._spherical, mode, **multi, **kwargs)
+
+    def set_positions(self, targets=None, spherical_targets=None, forces=None,
+                      spherical_forces=None):
+        """
+        position control of every joint, with pybullet's default forces if None
+        :param targets: (np.ndarray) positions of the revolute and prismatic joints
+        :param spherical_targets: (np.ndarray) quaternions of the spherical joints, shape (m, 4)
+        :param forces: (np.ndarray or float) maximum forces of the revolute and prismatic joints
+        :param spherical_forces: (np.ndarray or float) maximum forces of the spherical joints,
+            shape (m, 3)
+        """
+        self._command(p.POSITION_CONTROL, targets, spherical_targets, forces, spherical_forces,
+                      "targetPositions")
+
+    def set_velocities(self, targets, forces=None):
+        """
+        velocity control of the revolute and prismatic joints, pybullet has no
+        velocity control of spherical joints
+        """
+        self._command(p.VELOCITY_CONTROL, targets, None, forces, None, "targetVelocities")
+
+    def set_torques(self, torques=None, spherical_torques=None):
+        """
+        torque control of every joint, see `disable_motors`
+        :param torques: (np.ndarray) torques of the revolute and prismatic joints
+        :param spherical_torques: (np.ndarray) torques of the spherical joints, shape (m, 3)
+        """
+        self._command(p.TORQUE_CONTROL, torques, spherical_torques, None, None, "forces")
+
+    def reset(self, positions, spherical_positions):
+        """
+        teleport every joint to a state at rest, in one call
+        :param positions: (np.ndarray) positions of the revolute and prismatic joints
+        :param spherical_positions: (np.ndarray) quaternions of the spherical joints, shape (m, 4)
+        """
+        values = [[value] for value in _as_list(positions, len(self._single_dof))]
+        values += _as_list(spherical_positions, len(self._spherical))
+        velocities = [[0.]] * len(self._single_dof) + [[0., 0., 0.]] * len(self._spherical)
+        p.resetJointStatesMultiDof(self.body, self._single_dof + self._spherical, values,
+                                   targetVelocities=velocities, physicsClientId=self.client_id)
+
+    def disable_motors(self):
+        """
+        turn off the motors pybullet puts on every joint, which resist torque control
+        """
+        self.set_velocities(np.zeros(len(self._single_dof)), forces=0)
+        if self._spherical:
+            # a position motor without force, the only one spherical joints take
+            p.setJointMotorControlMultiDofArray(
+                self.body, self._spherical, p.POSITION_CONTROL,
+                targetPositions=[[0, 0, 0, 1]] * len(self._spherical),
+                forces=[[0, 0, 0]] * len(self._spherical),
+                physicsClientId=self.client_id)
@@ -0,0 +1,120 @@
+import os
+import pickle
+
+import numpy as np
+import pybullet as p
+
+from pybullet_utils import Joint
+
+# URDF path -> RobotModel, shared by every client of the process
+_models = {}
+
+
+class RobotModel:
+    """
+    Static description of a robot's joints, read once with p.getJointInfo.
+
+    Joint names and link names map to indices, and the joint types,
+    limits, maximum force and velocity, damping and friction are NumPy
+    arrays in joint index order. A joint without limits has its lower
+    limit above its upper one, as pybullet reports it. The model does not
+    depend on the client or the body, so `load` keeps one per URDF for the
+    whole process and pickles it next to the URDF for the other processes,
+    until the URDF is modified.
+
+    :param urdf_path: (str) URDF the joints were read from
+    :param joints: (list) Joint of every joint, in index order
+    """
+
+    def __init__(self, urdf_path, joints):
+        self.urdf_path = urdf_path
+        self.joints = joints
+        self.n_joints = len(joints)
+
+        self.names = [joint.name for joint in joints]
+        self.joint_indices = {joint.name: joint.index for joint in joints}
+        self.link_indices = {joint.linkName: joint.index for joint in joints}
+
+        self.types = np.array([joint.type for joint in joints], dtype=np.int32)
+        self.lower = np.array([joint.lowerLimit for joint in joints], dtype=np.float64)
+        self.upper = np.array([joint.upperLimit for joint in joints], dtype=np.float64)
+        self.max_force = np.array([joint.maxForce for joint in joints], dtype=np.float64)
+        self.max_velocity = np.array([joint.maxVelocity for joint in joints], dtype=np.float64)
+        self.damping = np.array([joint.damping for joint in joints], dtype=np.float64)
+        self.friction = np.array([joint.friction for joint in joints], dtype=np.float64)
+
+        # revolute and prismatic joints have one position, spherical ones a quaternion
+        self.movable = np.flatnonzero(self.types != p.JOINT_FIXED)
+        self.single_dof = np.flatnonzero((self.types == p.JOINT_REVOLUTE) |
+                                         (self.types == p.JOINT_PRISMATIC))
+        self.spherical = np.flatnonzero(self.types == p.JOINT_SPHERICAL)
+
+    def __repr__(self):
+        return (f"RobotModel({os.path.basename(self.urdf_path)}: {self.n_joints} joints, "
+                f"{len(self.single_dof)} revolute or prismatic, {len(self.spherical)} spherical)")
+
+    def indices(self, names):
+        """
+        :param names: (list) joint names
+        :return: (np.ndarray) their joint indices
+        """
+        return np.array([self.joint_indices[name] for name in names], dtype=np.int64)
+
+    @classmethod
+    def from_body(cls, urdf_path, body, client_id=None):
+        """
+        read the joints of a body loaded from `urdf_path`
+        """
+        n_joints = p.getNumJoints(body, physicsClientId=client_id)
+        joints = [Joint(*p.getJointInfo(body, i, physicsClientId=client_id))
+                  for i in range(n_joints)]
+        return cls(urdf_path, joints)
+
+    @classmethod
+    def load(cls, urdf_path, body=None, client_id=None):
+        """
+        the model of `urdf_path`, from the process cache, else from the pickle next
+        to the URDF, else read from `body` or from a DIRECT client of its own
+        :param urdf_path: (str) URDF of the robot
+        :param body: (int) body already loaded from `urdf_path`, if any
+        :param client_id: (int) physics client of `body`
+        :return: (RobotModel)
+        """
+        key = os.path.realpath(urdf_path)
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        cache_path = key + ".model.pkl"
+        mtime = os.path.getmtime(key)
+        try:
+            with open(cache_path, "rb") as f:
+                cached_mtime, model = pickle.load(f)
+            if cached_mtime != mtime:
+                model = None
+        except Exception:
+            # missing, stale or written by an incompatible version
+            model = None
+
+        if model is None:
+            if body is not None:
+                model = cls.from_body(key, body, client_id)
+            else:
+                direct = p.connect(p.DIRECT)
+                try:
+                    model = cls.from_body(key, p.loadURDF(key, physicsClientId=direct), direct)
+                finally:
+                    p.disconnect(physicsClientId=direct)
+
+            # write then rename, so a process never reads a half written pickle
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    pickle.dump((mtime, model), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                # read-only checkout, the model is only cached in this process
+                pass
+
+        _models[key] = model
+        return model
@@ -1,11 +1,12 @@
 import os
 import math
-import time
 
 import pybullet as p
 import pybullet_data
 
+from scara_ik import ScaraIK
 from pybullet_utils import display_joints_info
+from sim_runner import SimulationRunner, parse_runner_args
 
 PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
 
@@ -34,7 +35,7 @@ cameraDistance = 4.0
 cameraYaw = 0
 cameraPitch = -40
 
-# Amount of time to sleep each step
+# Simulated time of each step
 timeStep = 1. / 240.
 
 display_joints_info(robot, client_id=client_id)
@@ -43,13 +44,14 @@ endEffectorLinkIndex = p.getNumJoints(robot, physicsClientId=client_id) - 1
 
 targetPos = (1, 0, 1)
 
-# Calculate the inverse kinematics
-jointPoses = p.calculateInverseKinematics(
-    robot, endEffectorLinkIndex, targetPos)
+# Calculate the inverse kinematics in closed form, the arm only moves in its plane
+scara_ik = ScaraIK(os.path.join(PROJECT_DIR, "urdf", "scara_robot.urdf"),
+                   base_position=[0.5, 0.5, -0.1])
+jointPoses, reached = scara_ik.solve([targetPos])
 
-print(jointPoses)
+print(jointPoses[0], reached[0])
 
-while False:
+def control(tick):
 
     # Update the camera rotation
     # cameraYaw += 0.1
@@ -64,8 +66,9 @@ while False:
     p.setJointMotorControlArray(robot, [1, 2], p.POSITION_CONTROL, targetPositions=[
                                 target_arm_1, target_arm_2])
 
-    # Step the simulation
-    p.stepSimulation(physicsClientId=client_id)
 
-    # Sleep for a bit
-    time.sleep(timeStep)
+# The control loop is not run yet
+if False:
+    # Step the simulation at a fixed timestep, see sim_runner.py for the modes
+    runner = SimulationRunner(client_id, time_step=timeStep, **parse_runner_args())
+    runner.run(control)
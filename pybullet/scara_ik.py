@@ -0,0 +1,120 @@
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+
+def _xyz(element, attribute, default="0 0 0"):
+    if element is None:
+        return np.array([float(v) for v in default.split()])
+    return np.array([float(v) for v in element.get(attribute, default).split()])
+
+
+class ScaraIK:
+    """
+    Closed-form kinematics of a planar 2-link arm rotating about z, like scara_robot.urdf.
+
+    The link lengths, height and joint limits are read from the URDF:
+    the first link goes from the first to the second movable joint, and
+    the second link is twice the offset of its visual, which is centred
+    on it. Every target has two solutions, elbow up (second joint >= 0)
+    and elbow down (second joint <= 0). Without a pose reaching a target,
+    the arm is stretched or folded towards it, which is the closest it
+    can get. PyBullet's iterative solver is not used as a fallback: it
+    tilts the spherical first joint out of the plane instead of turning it.
+
+    :param urdf_path: (str) URDF of the robot
+    :param base_position: (tuple) base position of the robot in the simulation
+    :param z_tolerance: (float) distance to the plane of the arm under which a target is reachable
+    """
+
+    def __init__(self, urdf_path, base_position=(0, 0, 0), z_tolerance=1e-3):
+        robot = ET.parse(urdf_path).getroot()
+        joints = [j for j in robot.findall("joint") if j.get("type") != "fixed"]
+        if len(joints) != 2:
+            raise ValueError(f"{urdf_path} has {len(joints)} movable joints, not 2, "
+                             "use ik.IKSolver instead")
+        for joint in joints:
+            if not np.allclose(_xyz(joint.find("axis"), "xyz", "1 0 0"), (0, 0, 1)):
+                raise ValueError(f"joint {joint.get('name')} of {urdf_path} does not rotate "
+                                 "about z, use ik.IKSolver instead")
+
+        first, second = joints
+        # height of the fixed joints and of the first movable one above the base
+        height = sum(_xyz(j.find("origin"), "xyz")[2] for j in robot.findall("joint")
+                     if j.get("type") == "fixed")
+        height += _xyz(first.find("origin"), "xyz")[2]
+
+        link1 = _xyz(second.find("origin"), "xyz")
+        child = robot.find(f"link[@name='{second.find('child').get('link')}']")
+        link2 = 2 * _xyz(child.find("visual/origin"), "xyz")
+        if abs(link1[2]) > 1e-9 or abs(link2[2]) > 1e-9:
+            raise ValueError(f"the links of {urdf_path} are not in a plane, use ik.IKSolver instead")
+
+        self.l1 = float(np.hypot(link1[0], link1[1]))
+        self.l2 = float(np.hypot(link2[0], link2[1]))
+        # direction of the links when both joints are at 0
+        self.zero_angle = float(np.arctan2(link1[1], link1[0]))
+        self.base = np.array(base_position, dtype=np.float64)[:2]
+        self.height = float(base_position[2] + height)
+        self.z_tolerance = z_tolerance
+
+        limits = [j.find("limit") for j in joints]
+        self.lower = np.array([float(l.get("lower", -np.pi)) for l in limits])
+        self.upper = np.array([float(l.get("upper", np.pi)) for l in limits])
+
+    def forward(self, q):
+        """
+        :param q: (np.ndarray) joint positions, shape (n, 2)
+        :return: (np.ndarray) positions of the tip of the arm, shape (n, 3)
+        """
+        q = np.asarray(q, dtype=np.float64).reshape(-1, 2)
+        a1 = self.zero_angle + q[:, 0]
+        a2 = a1 + q[:, 1]
+
+        tips = np.empty((len(q), 3))
+        tips[:, 0] = self.base[0] + self.l1 * np.cos(a1) + self.l2 * np.cos(a2)
+        tips[:, 1] = self.base[1] + self.l1 * np.sin(a1) + self.l2 * np.sin(a2)
+        tips[:, 2] = self.height
+        return tips
+
+    def inverse(self, targets):
+        """
+        :param targets: (np.ndarray) positions of the tip, shape (n, 3)
+        :return: (np.ndarray, np.ndarray) elbow up and elbow down joint positions,
+            shape (n, 2, 2), and whether each reaches its target within the joint
+            limits, shape (n, 2)
+        """
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+        dx = targets[:, 0] - self.base[0]
+        dy = targets[:, 1] - self.base[1]
+
+        cos_q2 = (dx ** 2 + dy ** 2 - self.l1 ** 2 - self.l2 ** 2) / (2 * self.l1 * self.l2)
+        in_reach = (np.abs(cos_q2) <= 1) & (np.abs(targets[:, 2] - self.height) <= self.z_tolerance)
+        # out of reach, stretched (cos > 1) or folded (cos < -1) towards the target
+        q2 = np.arccos(np.clip(cos_q2, -1, 1))
+
+        solutions = np.empty((len(targets), 2, 2))
+        direction = np.arctan2(dy, dx) - self.zero_angle
+        for elbow, sign in enumerate((1, -1)):
+            elbow_q2 = sign * q2
+            q1 = direction - np.arctan2(self.l2 * np.sin(elbow_q2), self.l1 + self.l2 * np.cos(elbow_q2))
+            # wrap to [-pi, pi)
+            solutions[:, elbow, 0] = (q1 + np.pi) % (2 * np.pi) - np.pi
+            solutions[:, elbow, 1] = elbow_q2
+
+        within_limits = np.all((solutions >= self.lower) & (solutions <= self.upper), axis=2)
+        return solutions, in_reach[:, None] & within_limits
+
+    def solve(self, targets, elbow_up=True):
+        """
+        :param targets: (np.ndarray) positions of the tip, shape (n, 3)
+        :param elbow_up: (bool) the preferred solution when both are valid
+        :return: (np.ndarray, np.ndarray) one joint position per target within the
+            joint limits, shape (n, 2), and whether it reaches the target, shape (n,)
+        """
+        solutions, valid = self.inverse(targets)
+        preferred, other = (0, 1) if elbow_up else (1, 0)
+
+        use_other = ~valid[:, preferred] & valid[:, other]
+        q = np.where(use_other[:, None], solutions[:, other], solutions[:, preferred])
+        return np.clip(q, self.lower, self.upper), valid.any(axis=1)
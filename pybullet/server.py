@@ -7,67 +7,30 @@ from PIL import Image
 # from stable_baselines3 import PPO
 # import gymnasium as gym
 import numpy as np
-from dataclasses import dataclass
+
+from camera_rig import CameraPose, CameraRig
 
 PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
-@dataclass
-class Joint:
-    index: int
-    name: str
-    type: int
-    gIndex: int
-    uIndex: int
-    flags: int
-    damping: float
-    friction: float
-    lowerLimit: float
-    upperLimit: float
-    maxForce: float
-    maxVelocity: float
-    linkName: str
-    axis: tuple
-    parentFramePosition: tuple
-    parentFrameOrientation: tuple
-    parentIndex: int
-
-    def __post_init__(self):
-        self.name = str(self.name, 'utf-8')
-        self.linkName = str(self.linkName, 'utf-8')
+# The camera of `render`, built by its first call and reused by the next ones
+render_rig = None
 
 
 def render(pybullet_scene):
-    width = 320
-    height = 200
+    global render_rig
 
     pybullet_scene.setRealTimeSimulation(1)
 
-    img_arr = pybullet_scene.getCameraImage(
-        width,
-        height,
-        viewMatrix=pybullet_scene.computeViewMatrixFromYawPitchRoll(
-            cameraTargetPosition=[0, 0, 0],
-            distance=3,
-            yaw=45,
-            pitch=-30,
-            roll=0,
-            upAxisIndex=2,
-        ),
-        projectionMatrix=pybullet_scene.computeProjectionMatrixFOV(
-            fov=60,
-            aspect=width/height,
-            nearVal=0.01,
-            farVal=100,
-        ),
-        shadow=True,
-        lightDirection=[1, 1, 1],
-    )
-
-    width, height, rgbPixels, depth, mask = img_arr
-
-    # Make a new image object from the bytes
-    img = Image.frombytes('RGBA', (width, height), bytes(rgbPixels))
+    # capture the scene given, a new one gets its own rig
+    if render_rig is None or render_rig.bullet is not pybullet_scene:
+        render_rig = CameraRig([CameraPose(target=(0, 0, 0), distance=3, yaw=45, pitch=-30)],
+                               width=320, height=200, shadow=True, segmentation=False,
+                               bullet=pybullet_scene)
+    render_rig.capture()
+
+    # Make a new image object from a view of the rig buffer
+    img = Image.fromarray(render_rig.rgba[0], 'RGBA')
 
     img.save(os.path.join(os.path.dirname(PROJECT_DIR), 'data', 'pybullet.png'))
 
@@ -88,18 +51,6 @@ def render(pybullet_scene):
 #                 reset_num_timesteps=False, tb_log_name=f"{TIMESTEPS}")
 
 
-def display_joints_info(urdf_id, client_id=None):
-    n_joints = p.getNumJoints(urdf_id, physicsClientId=client_id)
-
-    print("==========joints info=========")
-
-    for i in range(n_joints):
-        joint = Joint(*p.getJointInfo(urdf_id, i, physicsClientId=client_id))
-        print(joint)
-
-    print("==========joints info=========")
-
-
 def demo():
 
     # client_id = p.connect(p.DIRECT)
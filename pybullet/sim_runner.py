@@ -0,0 +1,124 @@
+import argparse
+import time
+
+import pybullet as p
+
+MODES = ("realtime", "fast")
+
+
+class SimulationRunner:
+    """
+    Steps a physics client at a fixed timestep.
+
+    Every tick calls the control callback once, then steps the simulation
+    `substeps` times. In 'realtime' mode ticks are scheduled against
+    deadlines rather than with a fixed sleep, so the time spent in the
+    loop body does not make the simulation drift; when it falls more than
+    `max_lag` seconds behind it gives up catching up. In 'fast' mode it
+    never sleeps, for data generation.
+    The achieved rate and the time of each phase are printed every
+    `report_every` seconds and kept in `stats()`.
+
+    :param client_id: (int) physics client to step
+    :param time_step: (float) seconds of simulation per step
+    :param mode: (str) 'realtime' or 'fast'
+    :param substeps: (int) simulation steps per tick
+    :param report_every: (float) seconds between two reports, None for no report
+    :param max_lag: (float) seconds behind real time before the schedule is reset
+    """
+
+    def __init__(self, client_id, time_step=1. / 240., mode="realtime", substeps=1,
+                 report_every=5.0, max_lag=0.25):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode}, expected one of {MODES}")
+
+        self.client_id = client_id
+        self.time_step = time_step
+        self.mode = mode
+        self.substeps = substeps
+        self.report_every = report_every
+        self.max_lag = max_lag
+
+        p.setTimeStep(time_step, physicsClientId=client_id)
+
+        self.ticks = 0
+        self.steps = 0
+        # phase -> seconds spent in it since the start
+        self.timings = {"control": 0.0, "physics": 0.0, "sleep": 0.0}
+        self.elapsed = 0.0
+
+    def stats(self):
+        """
+        :return: (dict) achieved steps per second, real-time factor and milliseconds
+            per tick of every phase
+        """
+        elapsed = max(self.elapsed, 1e-9)
+        ticks = max(self.ticks, 1)
+        return {
+            "steps_per_second": self.steps / elapsed,
+            "realtime_factor": self.steps * self.time_step / elapsed,
+            **{f"{phase}_ms": 1000 * seconds / ticks for phase, seconds in self.timings.items()},
+        }
+
+    def report(self):
+        stats = self.stats()
+        phases = ", ".join(f"{phase} {stats[f'{phase}_ms']:.3f}"
+                           for phase in self.timings)
+        print(f"{stats['steps_per_second']:.0f} steps/s ({stats['realtime_factor']:.2f}x real time), "
+              f"ms per tick: {phases}")
+
+    def run(self, control=None, ticks=None):
+        """
+        :param control: (callable) called with the tick number before each tick, stops
+            the run by returning False
+        :param ticks: (int) number of ticks to run, forever if None
+        """
+        period = self.time_step * self.substeps
+        start = time.perf_counter()
+        deadline = start
+        next_report = start + self.report_every if self.report_every else None
+        end_tick = None if ticks is None else self.ticks + ticks
+
+        while end_tick is None or self.ticks < end_tick:
+            t0 = time.perf_counter()
+            if control is not None and control(self.ticks) is False:
+                break
+            t1 = time.perf_counter()
+            for _ in range(self.substeps):
+                p.stepSimulation(physicsClientId=self.client_id)
+            t2 = time.perf_counter()
+
+            self.ticks += 1
+            self.steps += self.substeps
+            self.timings["control"] += t1 - t0
+            self.timings["physics"] += t2 - t1
+
+            if self.mode == "realtime":
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -self.max_lag:
+                    # too far behind to catch up, restart the schedule from now
+                    deadline = time.perf_counter()
+                self.timings["sleep"] += time.perf_counter() - t2
+
+            now = time.perf_counter()
+            self.elapsed += now - t0
+            if next_report is not None and now >= next_report:
+                self.report()
+                next_report = now + self.report_every
+
+
+def parse_runner_args(argv=None):
+    """
+    read the runner options of a scene script from the command line
+    :return: (dict) keyword arguments of SimulationRunner
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=MODES, default="realtime",
+                        help="realtime for viewing, fast for data generation")
+    parser.add_argument("--substeps", type=int, default=1,
+                        help="simulation steps per tick")
+    args, _ = parser.parse_known_args(argv)
+    return {"mode": args.mode, "substeps": args.substeps}
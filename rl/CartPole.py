@@ -1,12 +1,15 @@
 import os
+from typing import Callable, Optional, Union
 
 import gymnasium as gym
 import numpy as np
 from stable_baselines3 import PPO
 from stable_baselines3.ppo.policies import MlpPolicy
 from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.evaluation import evaluate_policy
 
+from evaluation import evaluate_episodes
 from utils import record_video
 
 
@@ -14,36 +17,31 @@ def evaluate(
     model: BaseAlgorithm,
     num_episodes: int = 100,
     deterministic: bool = True,
+    env_fn: Optional[Union[str, Callable[[], gym.Env]]] = None,
+    n_envs: int = 8,
 ) -> float:
     """
     Evaluate an RL agent for `num_episodes`.
 
     :param model: the RL Agent
-    :param env: the gym Environment
     :param num_episodes: number of episodes to evaluate it
     :param deterministic: Whether to use deterministic or stochastic actions
+    :param env_fn: env id or function building one env, the episodes are run on
+        `n_envs` of them; None to run them on the env of the model
+    :param n_envs: number of envs built with `env_fn`, the policy is called once
+        per step for all of them
     :return: Mean reward for the last `num_episodes`
     """
-    # This function will only work for a single environment
-    vec_env = model.get_env()
-    obs = vec_env.reset()
-    all_episode_rewards = []
-    for _ in range(num_episodes):
-        episode_rewards = []
-        done = False
-        # Note: SB3 VecEnv resets automatically:
-        # https://stable-baselines3.readthedocs.io/en/master/guide/vec_envs.html#vecenv-api-vs-gym-api
-        # obs = vec_env.reset()
-        while not done:
-            # _states are only useful when using LSTM policies
-            # `deterministic` is to use deterministic actions
-            action, _states = model.predict(obs, deterministic=deterministic)
-            # here, action, rewards and dones are arrays
-            # because we are using vectorized env
-            obs, reward, done, _info = vec_env.step(action)
-            episode_rewards.append(reward)
-
-        all_episode_rewards.append(sum(episode_rewards))
+    # Note: SB3 VecEnv resets automatically:
+    # https://stable-baselines3.readthedocs.io/en/master/guide/vec_envs.html#vecenv-api-vs-gym-api
+    if env_fn is None:
+        vec_env = model.get_env()
+    else:
+        vec_env = make_vec_env(env_fn, n_envs=n_envs)
+    all_episode_rewards, _lengths, _steps = evaluate_episodes(
+        model, vec_env, num_episodes, deterministic)
+    if env_fn is not None:
+        vec_env.close()
 
     mean_episode_reward = np.mean(all_episode_rewards)
     print(
@@ -52,6 +50,10 @@ def evaluate(
     return mean_episode_reward
 
 
+def make_monitored_cartpole():
+    return MyMonitorWrapper(gym.make("CartPole-v1"))
+
+
 class MyMonitorWrapper(gym.Wrapper):
     """
     :param env: (gym.Env) Gym environment that will be wrapped
@@ -105,43 +107,44 @@ class MyMonitorWrapper(gym.Wrapper):
         return obs, reward, terminated, truncated, info
 
 
-env = gym.make("CartPole-v1")
-env = MyMonitorWrapper(env=env)
+if __name__ == "__main__":
+    env = gym.make("CartPole-v1")
+    env = MyMonitorWrapper(env=env)
 
-model = PPO(MlpPolicy, env, verbose=0)
+    model = PPO(MlpPolicy, env, verbose=0)
 
-# Random Agent, before training
-mean_reward_before_train = evaluate(
-    model, num_episodes=100, deterministic=True)
+    # Random Agent, before training
+    mean_reward_before_train = evaluate(
+        model, num_episodes=100, deterministic=True, env_fn=make_monitored_cartpole)
 
-mean_reward, std_reward = evaluate_policy(
-    model, env, n_eval_episodes=100, warn=False)
+    mean_reward, std_reward = evaluate_policy(
+        model, env, n_eval_episodes=100, warn=False)
 
-print(f"mean_reward: {mean_reward:.2f} +/- {std_reward:.2f}")
+    print(f"mean_reward: {mean_reward:.2f} +/- {std_reward:.2f}")
 
-# Train the agent for 10000 steps
-model.learn(total_timesteps=10_000)
+    # Train the agent for 10000 steps
+    model.learn(total_timesteps=10_000)
 
-# Evaluate the trained agent
-mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=100)
+    # Evaluate the trained agent
+    mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=100)
 
-print(f"pre save mean_reward:{mean_reward:.2f} +/- {std_reward:.2f}")
+    print(f"pre save mean_reward:{mean_reward:.2f} +/- {std_reward:.2f}")
 
-save_dir = "/tmp/gym/"
-os.makedirs(save_dir, exist_ok=True)
+    save_dir = "/tmp/gym/"
+    os.makedirs(save_dir, exist_ok=True)
 
-# The model will be saved under PPO_tutorial.zip
-model.save(f"{save_dir}/PPO_tutorial")
+    # The model will be saved under PPO_tutorial.zip
+    model.save(f"{save_dir}/PPO_tutorial")
 
-del model  # delete trained model to demonstrate loading
+    del model  # delete trained model to demonstrate loading
 
-loaded_model = PPO.load(f"{save_dir}/PPO_tutorial")
+    loaded_model = PPO.load(f"{save_dir}/PPO_tutorial")
 
-mean_reward, std_reward = evaluate_policy(
-    loaded_model, env, n_eval_episodes=100)
-# Check that the prediction is the same after loading (for the same observation)
-print(f"loaded mean_reward:{mean_reward:.2f} +/- {std_reward:.2f}")
+    mean_reward, std_reward = evaluate_policy(
+        loaded_model, env, n_eval_episodes=100)
+    # Check that the prediction is the same after loading (for the same observation)
+    print(f"loaded mean_reward:{mean_reward:.2f} +/- {std_reward:.2f}")
 
-# record_video("CartPole-v1", model, video_length=500, prefix="ppo-cartpole")
+    # record_video("CartPole-v1", model, video_length=500, prefix="ppo-cartpole")
 
-# show_videos("videos", prefix="ppo")
+    # show_videos("videos", prefix="ppo")
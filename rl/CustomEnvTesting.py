@@ -1,4 +1,3 @@
-
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
@@ -6,25 +5,6 @@ from stable_baselines3.common.env_checker import check_env
 from stable_baselines3 import PPO, A2C, DQN
 from stable_baselines3.common.env_util import make_vec_env
 
-env = gym.make("CartPole-v1")
-
-# Box(4,) means that it is a Vector with 4 components
-print("Observation space:", env.observation_space)
-print("Shape:", env.observation_space.shape)
-# Discrete(2) means that there is two discrete actions
-print("Action space:", env.action_space)
-
-# The reset method is called at the beginning of an episode
-obs, info = env.reset()
-# Sample a random action
-action = env.action_space.sample()
-print("Sampled action:", action)
-obs, reward, terminated, truncated, info = env.step(action)
-# Note the obs is a numpy array
-# info is an empty dict for now but can contain any debugging info
-# reward is a scalar
-print(obs.shape, reward, terminated, truncated, info)
-
 
 class GoLeftEnv(gym.Env):
     """
@@ -113,23 +93,7 @@ class GoLeftEnv(gym.Env):
         pass
 
 
-env = GoLeftEnv()
-# If the environment don't follow the interface, an error will be thrown
-check_env(env, warn=True)
-
-
-# actually test the environment
-env = GoLeftEnv(grid_size=10)
-
-obs, _ = env.reset()
-env.render()
-
-print(env.observation_space)
-print(env.action_space)
-print(env.action_space.sample())
-
-
-def test_env():
+def test_env(env):
     GO_LEFT = 0
     # Hardcoded best agent: always go left!
     n_steps = 20
@@ -144,27 +108,65 @@ def test_env():
             break
 
 
-# Instantiate the env
-vec_env = make_vec_env(GoLeftEnv, n_envs=1, env_kwargs=dict(grid_size=10))
+def main():
+    env = gym.make("CartPole-v1")
+
+    # Box(4,) means that it is a Vector with 4 components
+    print("Observation space:", env.observation_space)
+    print("Shape:", env.observation_space.shape)
+    # Discrete(2) means that there is two discrete actions
+    print("Action space:", env.action_space)
+
+    # The reset method is called at the beginning of an episode
+    obs, info = env.reset()
+    # Sample a random action
+    action = env.action_space.sample()
+    print("Sampled action:", action)
+    obs, reward, terminated, truncated, info = env.step(action)
+    # Note the obs is a numpy array
+    # info is an empty dict for now but can contain any debugging info
+    # reward is a scalar
+    print(obs.shape, reward, terminated, truncated, info)
+
+    env = GoLeftEnv()
+    # If the environment don't follow the interface, an error will be thrown
+    check_env(env, warn=True)
 
-# Train the agent
-model = A2C("MlpPolicy", env, verbose=1).learn(5000)
+    # actually test the environment
+    env = GoLeftEnv(grid_size=10)
 
-# Test the trained agent
-# using the vecenv
-obs = vec_env.reset()
+    obs, _ = env.reset()
+    env.render()
+
+    print(env.observation_space)
+    print(env.action_space)
+    print(env.action_space.sample())
+
+    # Instantiate the env
+    vec_env = make_vec_env(GoLeftEnv, n_envs=1, env_kwargs=dict(grid_size=10))
+
+    # Train the agent
+    model = A2C("MlpPolicy", vec_env, verbose=1).learn(5000)
+
+    # Test the trained agent
+    # using the vecenv
+    obs = vec_env.reset()
+
+    n_steps = 20
+
+    for step in range(n_steps):
+        action, _ = model.predict(obs, deterministic=True)
+        print(f"Step {step + 1}")
+        print("Action: ", action)
+        obs, reward, done, info = vec_env.step(action)
+        print("obs=", obs, "reward=", reward, "done=", done)
+        vec_env.render()
+        if done:
+            # Note that the VecEnv resets automatically
+            # when a done signal is encountered
+            print("Goal reached!", "reward=", reward)
+            break
 
-n_steps = 20
 
-for step in range(n_steps):
-    action, _ = model.predict(obs, deterministic=True)
-    print(f"Step {step + 1}")
-    print("Action: ", action)
-    obs, reward, done, info = vec_env.step(action)
-    print("obs=", obs, "reward=", reward, "done=", done)
-    vec_env.render()
-    if done:
-        # Note that the VecEnv resets automatically
-        # when a done signal is encountered
-        print("Goal reached!", "reward=", reward)
-        break
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,18 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 import cv2
+import math
 import random
-import time
-from collections import deque
 from stable_baselines3.common.env_checker import check_env
 from stable_baselines3 import PPO
-from stable_baselines3.common.evaluation import evaluate_policy
+from stable_baselines3.common.utils import safe_mean
+from stable_baselines3.common.vec_env import VecEnv, VecMonitor
 import os
-from pathlib import Path
+from functools import partial
+
+from checkpoints import CheckpointManager
+from evaluation import evaluate_parallel
+from snake_body import SnakeBody
 
 
 def collision_with_apple(apple_position, score):
@@ -31,17 +35,42 @@ def collision_with_boundaries(snake_head):
         return 0
 
 
-def collision_with_self(snake_position):
+def collision_with_self(snake_body):
     """
     when snake collides with its body, terminate the game
     """
-    snake_head = snake_position[0]
-    if snake_head in snake_position[1:]:
+    if snake_body.hits_self():
         return 1
     else:
         return 0
 
 
+def draw_frame(snake_position, apple_position):
+    """
+    draw the apple and the snake on a blank 500x500 frame
+    """
+    img = np.zeros((500, 500, 3), dtype='uint8')
+    # Display Apple
+    cv2.rectangle(img, (apple_position[0], apple_position[1]), (
+        apple_position[0]+10, apple_position[1]+10), (0, 0, 255), 3)
+    # Display Snake
+    for position in snake_position:
+        cv2.rectangle(img, (position[0], position[1]),
+                      (position[0]+10, position[1]+10), (0, 255, 0), 3)
+    return img
+
+
+def draw_game_over(score):
+    """
+    draw the final score on a blank 500x500 frame
+    """
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    img = np.zeros((500, 500, 3), dtype='uint8')
+    cv2.putText(img, 'Your Score is {}'.format(
+        score), (140, 250), font, 1, (255, 255, 255), 2, cv2.LINE_AA)
+    return img
+
+
 SNAKE_LEN_GOAL = 30
 # 4 moves possible for a snake game
 N_DISCRETE_ACTIONS = 4
@@ -72,11 +101,23 @@ class CustomActionSpace(spaces.Discrete):
 
 
 class SnekEnv(gym.Env):
-    """Custom Environment that follows gym interface"""
+    """
+    Custom Environment that follows gym interface
+
+    :param render_mode: (str) None to skip all drawing (training),
+        "rgb_array" to build frames only when `render()` is called,
+        "human" to show every step in an OpenCV window
+    :param obs_dtype: (np.dtype) dtype of the observations, np.float32 saves
+        SB3 a conversion on every rollout step
+    """
+
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 30}
 
-    def __init__(self):
+    def __init__(self, render_mode=None, obs_dtype=np.int64):
 
         super(SnekEnv, self).__init__()
+        assert render_mode is None or render_mode in self.metadata["render_modes"]
+        self.render_mode = render_mode
         # Define action and observation space
         # They must be gym.spaces objects
         # Example when using discrete actions:
@@ -84,31 +125,34 @@ class SnekEnv(gym.Env):
         self.action_space = CustomActionSpace(N_DISCRETE_ACTIONS)
         # Example for using image as input (channel-first; channel-last also works):
         self.observation_space = spaces.Box(low=-500, high=500,
-                                            shape=(5+SNAKE_LEN_GOAL,), dtype=np.int64)
+                                            shape=(5+SNAKE_LEN_GOAL,), dtype=obs_dtype)
+
+        # observation is written in place, the last SNAKE_LEN_GOAL actions are
+        # kept twice in a ring buffer so they can be copied as one slice
+        self.observation = np.zeros(5+SNAKE_LEN_GOAL, dtype=obs_dtype)
+        self.prev_actions = np.full(2*SNAKE_LEN_GOAL, -1, dtype=obs_dtype)
+        self.prev_actions_start = 0
+
+    def _get_observation(self):
+        observation = self.observation
+
+        observation[0] = self.snake_head[0]
+        observation[1] = self.snake_head[1]
+        observation[2] = self.apple_position[0] - self.snake_head[0]
+        observation[3] = self.apple_position[1] - self.snake_head[1]
+        observation[4] = len(self.snake_position)
+        start = self.prev_actions_start
+        observation[5:] = self.prev_actions[start:start+SNAKE_LEN_GOAL]
+
+        return observation.copy()
 
     def step(self, action):
 
-        self.prev_actions.append(action)
-        cv2.imshow('a', self.img)
-        cv2.waitKey(1)
-        self.img = np.zeros((500, 500, 3), dtype='uint8')
-        # Display Apple
-        cv2.rectangle(self.img, (self.apple_position[0], self.apple_position[1]), (
-            self.apple_position[0]+10, self.apple_position[1]+10), (0, 0, 255), 3)
-        # Display Snake
-        for position in self.snake_position:
-            cv2.rectangle(self.img, (position[0], position[1]),
-                          (position[0]+10, position[1]+10), (0, 255, 0), 3)
-
-        if False:
-            # Takes step after fixed time
-            t_end = time.time() + 0.001
-            k = -1
-            while time.time() < t_end:
-                if k == -1:
-                    k = cv2.waitKey(1)
-                else:
-                    continue
+        # overwrite the oldest action, oldest to newest is then [start, start + SNAKE_LEN_GOAL)
+        start = self.prev_actions_start
+        self.prev_actions[start] = action
+        self.prev_actions[start+SNAKE_LEN_GOAL] = action
+        self.prev_actions_start = (start + 1) % SNAKE_LEN_GOAL
 
         button_direction = action
         # Change the head position based on the button direction
@@ -126,26 +170,21 @@ class SnekEnv(gym.Env):
         if self.snake_head == self.apple_position:
             self.apple_position, self.score = collision_with_apple(
                 self.apple_position, self.score)
-            self.snake_position.insert(0, list(self.snake_head))
+            self.snake_position.move(self.snake_head, grow=True)
             apple_reward = 10000
 
         else:
-            self.snake_position.insert(0, list(self.snake_head))
-            self.snake_position.pop()
+            self.snake_position.move(self.snake_head)
 
         # On collision kill the snake and print the score
         if collision_with_boundaries(self.snake_head) == 1 or collision_with_self(self.snake_position) == 1:
         # if collision_with_boundaries(self.snake_head) == 1:
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            self.img = np.zeros((500, 500, 3), dtype='uint8')
-            cv2.putText(self.img, 'Your Score is {}'.format(
-                self.score), (140, 250), font, 1, (255, 255, 255), 2, cv2.LINE_AA)
-            cv2.imshow('a', self.img)
             self.done = True
 
         # add euclidean distance
-        euclidean_dist_to_apple = np.linalg.norm(
-            np.array(self.snake_head) - np.array(self.apple_position))
+        euclidean_dist_to_apple = math.hypot(
+            self.snake_head[0] - self.apple_position[0],
+            self.snake_head[1] - self.apple_position[1])
         # self.total_reward = len(self.snake_position) - \
         #     3 - euclidean_dist_to_apple
 
@@ -161,18 +200,11 @@ class SnekEnv(gym.Env):
             self.reward = -10
         info = {}
 
-        head_x = self.snake_head[0]
-        head_y = self.snake_head[1]
-
-        snake_length = len(self.snake_position)
-        apple_delta_x = self.apple_position[0] - head_x
-        apple_delta_y = self.apple_position[1] - head_y
-
         # create observation:
+        observation = self._get_observation()
 
-        observation = [head_x, head_y, apple_delta_x,
-                       apple_delta_y, snake_length] + list(self.prev_actions)
-        observation = np.array(observation)
+        if self.render_mode == "human":
+            self._render_frame()
 
         return observation, self.reward, self.done, False, info
 
@@ -183,9 +215,8 @@ class SnekEnv(gym.Env):
         """
         super().reset(seed=seed, options=options)
 
-        self.img = np.zeros((500, 500, 3), dtype='uint8')
         # Initial Snake and Apple position
-        self.snake_position = [[250, 250], [240, 250], [230, 250]]
+        self.snake_position = SnakeBody([[250, 250], [240, 250], [230, 250]])
         self.apple_position = [random.randrange(
             1, 50)*10, random.randrange(1, 50)*10]
         self.score = 0
@@ -197,31 +228,209 @@ class SnekEnv(gym.Env):
 
         self.done = False
 
-        head_x = self.snake_head[0]
-        head_y = self.snake_head[1]
-
-        snake_length = len(self.snake_position)
-        apple_delta_x = self.apple_position[0] - head_x
-        apple_delta_y = self.apple_position[1] - head_y
-
         # however long we aspire the snake to be
-        self.prev_actions = deque(maxlen=SNAKE_LEN_GOAL)
-        for i in range(SNAKE_LEN_GOAL):
-            self.prev_actions.append(-1)  # to create history
+        self.prev_actions.fill(-1)  # to create history
+        self.prev_actions_start = 0
 
         # create observation:
-        observation = [head_x, head_y, apple_delta_x,
-                       apple_delta_y, snake_length] + list(self.prev_actions)
-        observation = np.array(observation)
+        observation = self._get_observation()
+
+        if self.render_mode == "human":
+            self._render_frame()
 
         return observation, {}
 
-    def render(self, mode='human'):
-        pass
+    def render(self):
+        if self.render_mode == "rgb_array":
+            return self._render_frame()
+        elif self.render_mode == "human":
+            self._render_frame()
+
+    def _render_frame(self):
+        if self.done:
+            img = draw_game_over(self.score)
+        else:
+            img = draw_frame(self.snake_position, self.apple_position)
+
+        if self.render_mode == "human":
+            cv2.imshow('a', img)
+            cv2.waitKey(1)
+
+        return img
+
+    def close(self):
+        if self.render_mode == "human":
+            cv2.destroyAllWindows()
+
+
+class SnakeVecEnv(VecEnv):
+    """
+    N snake games stepped at once with NumPy ops, same rules, rewards and
+    observations as SnekEnv. Use it in place of DummyVecEnv([SnekEnv] * N).
+
+    Games reset automatically when they end, the last observation is kept
+    in info["terminal_observation"] like the other SB3 VecEnvs.
+    Positions are stored in cells (pixels / 10), each game keeps its body
+    in a ring buffer and a 50x50 occupancy grid for self collision.
+
+    :param num_envs: (int) number of snake games
+    :param seed: (int) seed for the apple positions
+    :param render_mode: (str) None or "rgb_array"
+    :param obs_dtype: (np.dtype) dtype of the observations
+    """
+
+    # 0-Left, 1-Right, 2-Down, 3-Up, in cells
+    MOVES = np.array([[-1, 0], [1, 0], [0, 1], [0, -1]])
+    GRID_SIZE = 50
+    CELL_SIZE = 10
+
+    def __init__(self, num_envs, seed=None, render_mode=None, obs_dtype=np.int64):
+        assert render_mode is None or render_mode == "rgb_array"
+        self.render_mode = render_mode
+
+        observation_space = spaces.Box(low=-500, high=500,
+                                       shape=(5+SNAKE_LEN_GOAL,), dtype=obs_dtype)
+        super().__init__(num_envs, observation_space,
+                         CustomActionSpace(N_DISCRETE_ACTIONS))
+
+        self.np_random = np.random.default_rng(seed)
+
+        # a snake can not be longer than the grid
+        self.capacity = self.GRID_SIZE * self.GRID_SIZE
+        self.body = np.zeros((num_envs, self.capacity, 2), dtype=np.int64)
+        self.head_index = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.zeros(num_envs, dtype=np.int64)
+        self.occupancy = np.zeros(
+            (num_envs, self.GRID_SIZE, self.GRID_SIZE), dtype=np.uint8)
+        self.apple_position = np.zeros((num_envs, 2), dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.prev_reward = np.zeros(num_envs, dtype=np.float64)
+        self.prev_actions = np.full(
+            (num_envs, SNAKE_LEN_GOAL), -1, dtype=np.int64)
+
+        self.actions = None
+        self._envs = np.arange(num_envs)
+
+    def _reset_games(self, envs):
+        """
+        put the games in `envs` back to the initial snake [[250, 250], [240, 250], [230, 250]]
+        """
+        n = len(envs)
+
+        self.occupancy[envs] = 0
+        # tail first, the head is the last written cell
+        self.body[envs, 0] = (23, 25)
+        self.body[envs, 1] = (24, 25)
+        self.body[envs, 2] = (25, 25)
+        self.occupancy[envs, 23:26, 25] = 1
+        self.head_index[envs] = 2
+        self.length[envs] = 3
+
+        self.apple_position[envs] = self.np_random.integers(1, 50, size=(n, 2))
+        self.score[envs] = 0
+        self.prev_reward[envs] = 0
+        self.prev_actions[envs] = -1
+
+    def _observation(self, envs, head, length):
+        observation = np.empty((len(envs), 5+SNAKE_LEN_GOAL),
+                               dtype=self.observation_space.dtype)
+        observation[:, 0:2] = head * self.CELL_SIZE
+        observation[:, 2:4] = (self.apple_position[envs] - head) * self.CELL_SIZE
+        observation[:, 4] = length
+        observation[:, 5:] = self.prev_actions[envs]
+        return observation
+
+    def reset(self):
+        self._reset_games(self._envs)
+        head = self.body[self._envs, self.head_index]
+        return self._observation(self._envs, head, self.length)
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        envs = self._envs
+        actions = self.actions
+
+        self.prev_actions[:, :-1] = self.prev_actions[:, 1:]
+        self.prev_actions[:, -1] = actions
+
+        # Change the head position based on the button direction
+        head = self.body[envs, self.head_index] + self.MOVES[actions]
+
+        # Increase Snake length on eating apple, otherwise the tail moves on
+        ate = np.all(head == self.apple_position, axis=1)
+        moved = envs[~ate]
+        tail = self.body[moved, (self.head_index[moved] -
+                                 self.length[moved] + 1) % self.capacity]
+        self.occupancy[moved, tail[:, 0], tail[:, 1]] = 0
+        length = self.length + ate
+
+        eaten = envs[ate]
+        self.score[eaten] += 1
+        self.apple_position[eaten] = self.np_random.integers(
+            1, 50, size=(len(eaten), 2))
+
+        # On collision kill the snake
+        out = np.any((head < 0) | (head >= self.GRID_SIZE), axis=1)
+        inside = np.clip(head, 0, self.GRID_SIZE - 1)
+        hit_self = ~out & (self.occupancy[envs, inside[:, 0], inside[:, 1]] > 0)
+        dones = out | hit_self
+
+        alive = envs[~dones]
+        self.head_index[alive] = (self.head_index[alive] + 1) % self.capacity
+        self.body[alive, self.head_index[alive]] = head[alive]
+        self.occupancy[alive, head[alive, 0], head[alive, 1]] = 1
+        self.length[alive] = length[alive]
+
+        euclidean_dist_to_apple = np.linalg.norm(
+            (head - self.apple_position) * self.CELL_SIZE, axis=1)
+        total_reward = ((250 - euclidean_dist_to_apple) + ate * 10000) / 100
+        rewards = total_reward - self.prev_reward
+        self.prev_reward = total_reward
+        rewards[dones] = -10
+
+        observation = self._observation(envs, head, length)
+        infos = [{} for _ in range(self.num_envs)]
+
+        ended = envs[dones]
+        if len(ended) > 0:
+            for i in ended:
+                infos[i]["terminal_observation"] = observation[i].copy()
+            self._reset_games(ended)
+            observation[ended] = self._observation(
+                ended, self.body[ended, self.head_index[ended]], self.length[ended])
+
+        return observation, rewards.astype(np.float32), dones, infos
+
+    def seed(self, seed=None):
+        self.np_random = np.random.default_rng(seed)
+        return [seed for _ in range(self.num_envs)]
+
+    def get_images(self):
+        images = []
+        for i in self._envs:
+            cells = self.body[i, (self.head_index[i] - np.arange(self.length[i])) % self.capacity]
+            images.append(draw_frame((cells * self.CELL_SIZE).tolist(),
+                                     (self.apple_position[i] * self.CELL_SIZE).tolist()))
+        return images
 
     def close(self):
         pass
 
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self, method_name)(*method_args, **method_kwargs)
+                for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
 
 # env = SnekEnv()
 # # It will check your custom environment and output additional warnings if needed
@@ -230,7 +439,7 @@ class SnekEnv(gym.Env):
 
 def run_env_demo():
     episodes = 50
-    env = SnekEnv()
+    env = SnekEnv(render_mode="human")
 
     for episode in range(episodes):
         done = False
@@ -242,33 +451,34 @@ def run_env_demo():
             print('reward', reward)
 
 
-def train_agent():
+def train_agent(n_envs=1):
+    """
+    :param n_envs: (int) number of snake games per rollout, more than one
+        steps them together in a SnakeVecEnv
+    """
 
     models_dir = os.path.join('models', 'snake-ppo')
     logdir = os.path.join('logs', 'snake-ppo')
 
-    if not os.path.exists(models_dir):
-        os.makedirs(models_dir)
-
     if not os.path.exists(logdir):
         os.makedirs(logdir)
 
-    paths = sorted(Path(models_dir).iterdir(), key=os.path.getmtime)
+    # keeps the last 5 checkpoints and the best one, saved in the background
+    checkpoints = CheckpointManager(models_dir, keep_last=5)
 
     last_model = None
-    last_iter = 0
 
-    env = SnekEnv()
+    if n_envs > 1:
+        env = VecMonitor(SnakeVecEnv(n_envs))
+    else:
+        env = SnekEnv()
     env.reset()
 
-    if len(paths) > 0:
-        # get last model file
-        last_model = paths[-1]
+    # get last model file and iteration
+    last_path, last_iter = checkpoints.latest()
 
-        # get last iteration
-        last_iter = int(os.path.splitext(last_model.name)[0])
-
-        last_model = PPO.load(last_model, env, verbose=1,
+    if last_path is not None:
+        last_model = PPO.load(last_path, env, verbose=1,
                               tensorboard_log=logdir)
 
     if last_model:
@@ -283,25 +493,42 @@ def train_agent():
         iters += 1
         model.learn(total_timesteps=TIMESTEPS,
                     reset_num_timesteps=False, tb_log_name=f"{last_iter+TIMESTEPS * iters}")
-        model.save(f"{models_dir}/{last_iter+TIMESTEPS * iters}")
+        # mean reward of the last 100 training episodes
+        mean_reward = safe_mean([ep_info["r"] for ep_info in model.ep_info_buffer]) \
+            if len(model.ep_info_buffer) > 0 else None
+        checkpoints.save(model, last_iter+TIMESTEPS * iters, mean_reward)
 
         if iters > 8:
             break
 
-
-# train_agent()
+    checkpoints.close()
 
 
-def evaludate_trained():
+# train_agent()
 
-    model = PPO.load("models/snake-ppo/100000")
 
-    env = SnekEnv()
+def evaludate_trained(n_episodes=1000, n_workers=os.cpu_count(), envs_per_worker=32):
+    """
+    :param n_episodes: (int) number of episodes to evaluate
+    :param n_workers: (int) processes the episodes are split over
+    :param envs_per_worker: (int) snake games stepped together in each process
+    """
+    # the manager of train_agent deletes old checkpoints, ask it which ones are left
+    checkpoints = CheckpointManager(os.path.join('models', 'snake-ppo'))
+    model_path = checkpoints.best() or checkpoints.latest()[0]
+    checkpoints.close()
+    if model_path is None:
+        raise FileNotFoundError("no snake checkpoint, run train_agent() first")
+    print(f"evaluating {model_path}")
 
-    mean_reward, std_reward = evaluate_policy(
-        model, env, n_eval_episodes=10, warn=False)
+    result = evaluate_parallel(model_path,
+                               partial(SnakeVecEnv, envs_per_worker),
+                               n_episodes=n_episodes, n_workers=n_workers)
 
-    print(f"mean_reward: {mean_reward:.2f} +/- {std_reward:.2f}")
+    print(f"mean_reward: {result['mean_reward']:.2f} +/- {result['std_reward']:.2f}")
+    print(f"mean_length: {result['mean_length']:.2f} +/- {result['std_length']:.2f}")
+    print(f"{result['episodes']} episodes, {result['steps_per_second']:.0f} steps per second")
 
 
-evaludate_trained()
+if __name__ == "__main__":
+    evaludate_trained()
@@ -4,6 +4,8 @@ import cv2
 import random
 import time
 
+from snake_body import SnakeBody
+
 
 def collision_with_apple(apple_position, score):
     apple_position = [random.randrange(1, 50)*10, random.randrange(1, 50)*10]
@@ -18,9 +20,8 @@ def collision_with_boundaries(snake_head):
         return 0
 
 
-def collision_with_self(snake_position):
-    snake_head = snake_position[0]
-    if snake_head in snake_position[1:]:
+def collision_with_self(snake_body):
+    if snake_body.hits_self():
         return 1
     else:
         return 0
@@ -28,7 +29,7 @@ def collision_with_self(snake_position):
 
 img = np.zeros((500, 500, 3), dtype='uint8')
 # Initial Snake and Apple position
-snake_position = [[250, 250], [240, 250], [230, 250]]
+snake_position = SnakeBody([[250, 250], [240, 250], [230, 250]])
 apple_position = [random.randrange(1, 50)*10, random.randrange(1, 50)*10]
 score = 0
 prev_button_direction = 1
@@ -85,11 +86,10 @@ while True:
     # Increase Snake length on eating apple
     if snake_head == apple_position:
         apple_position, score = collision_with_apple(apple_position, score)
-        snake_position.insert(0, list(snake_head))
+        snake_position.move(snake_head, grow=True)
 
     else:
-        snake_position.insert(0, list(snake_head))
-        snake_position.pop()
+        snake_position.move(snake_head)
 
     # On collision kill the snake and print the score
     if collision_with_boundaries(snake_head) == 1 or collision_with_self(snake_position) == 1:
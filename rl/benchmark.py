@@ -0,0 +1,274 @@
+"""
+Step throughput benchmark of the custom gym environments.
+
+Measures construction time, memory, reset cost and steps per second of
+every env alone and vectorized at several batch sizes, and writes the
+results as JSON so runs on different commits can be compared.
+
+    python benchmark.py --batch-sizes 1 8 64 256 --output benchmarks/head.json
+    python benchmark.py --baseline benchmarks/head.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import psutil
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from CartPole import make_monitored_cartpole
+from CustomEnvTesting import GoLeftEnv
+from SnakeEnv import SnekEnv, SnakeVecEnv
+
+PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
+PYBULLET_DIR = os.path.join(os.path.dirname(PROJECT_DIR), "pybullet")
+
+
+def make_simple_driving():
+    from gymenv import SimpleDrivingEnv
+    return SimpleDrivingEnv()
+
+
+def make_simple_driving_pixels():
+    from gymenv import SimpleDrivingPixelEnv
+    return SimpleDrivingPixelEnv()
+
+
+def make_humanoid():
+    from gymenv import HumanoidEnv
+    return HumanoidEnv()
+
+
+def make_driving_pool(batch_size):
+    from env_pool import EnvPool
+    return EnvPool(make_simple_driving, batch_size, os.cpu_count())
+
+
+def make_humanoid_pool(batch_size):
+    from gymenv import make_humanoid_pool
+    return make_humanoid_pool(batch_size)
+
+
+def get_env_fns():
+    """
+    :return: (dict) env name -> function building one env, the SimpleDriving
+        envs only when pybullet is installed
+    """
+    env_fns = {
+        "SnekEnv": SnekEnv,
+        "GoLeftEnv": partial(GoLeftEnv, grid_size=10),
+        "MyMonitorWrapper": make_monitored_cartpole,
+    }
+
+    sys.path.insert(0, PYBULLET_DIR)
+    try:
+        import pybullet  # noqa: F401
+        env_fns["SimpleDrivingEnv"] = make_simple_driving
+        env_fns["SimpleDrivingPixelEnv"] = make_simple_driving_pixels
+        env_fns["HumanoidEnv"] = make_humanoid
+    except ImportError:
+        print("pybullet is not installed, skipping SimpleDrivingEnv")
+
+    return env_fns
+
+
+# batched envs that replace DummyVecEnv([env_fn] * n) for an env,
+# built from the batch size
+NATIVE_VEC_ENVS = {
+    "SnekEnv": ("SnakeVecEnv", SnakeVecEnv),
+    "SimpleDrivingEnv": ("EnvPool", make_driving_pool),
+    "HumanoidEnv": ("EnvPool", make_humanoid_pool),
+}
+
+
+def random_actions(action_space, shape, rng):
+    """
+    pre-generate the actions so sampling is not part of the timing
+    """
+    if isinstance(action_space, spaces.Discrete):
+        return rng.integers(action_space.n, size=shape)
+    low = np.broadcast_to(action_space.low, shape + action_space.shape)
+    high = np.broadcast_to(action_space.high, shape + action_space.shape)
+    return rng.uniform(low, high).astype(action_space.dtype)
+
+
+def rss():
+    gc.collect()
+    return psutil.Process().memory_info().rss
+
+
+def workers_memory(venv):
+    """
+    :return: (int) memory of the worker processes of a multi-process VecEnv
+        (EnvPool, ShmVecEnv, SubprocVecEnv), 0 for a single-process one. The
+        pages they share with the process they were forked from are not counted
+    """
+    return sum(psutil.Process(process.pid).memory_full_info().uss
+               for process in getattr(venv, "processes", ()))
+
+
+def bench_single(env_fn, n_steps, n_resets, rng):
+    memory = rss()
+    start = time.perf_counter()
+    env = env_fn()
+    construct_seconds = time.perf_counter() - start
+    memory = rss() - memory
+
+    start = time.perf_counter()
+    for _ in range(n_resets):
+        env.reset()
+    reset_seconds = (time.perf_counter() - start) / n_resets
+
+    actions = random_actions(env.action_space, (n_steps,), rng)
+    start = time.perf_counter()
+    for action in actions:
+        _obs, _reward, terminated, truncated, _info = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    env.close()
+
+    return {
+        "batch_size": 1,
+        "construct_seconds": construct_seconds,
+        "memory_per_env_bytes": memory,
+        "reset_seconds": reset_seconds,
+        "steps_per_second": n_steps / elapsed,
+    }
+
+
+def bench_vec(venv_fn, batch_size, n_steps, n_resets, rng):
+    memory = rss()
+    start = time.perf_counter()
+    venv = venv_fn()
+    construct_seconds = time.perf_counter() - start
+    # the envs of multi-process VecEnvs live in the workers, not in this process
+    memory = rss() - memory + workers_memory(venv)
+
+    start = time.perf_counter()
+    for _ in range(n_resets):
+        venv.reset()
+    reset_seconds = (time.perf_counter() - start) / n_resets
+
+    # the same number of env steps whatever the batch size
+    n_calls = max(n_steps // batch_size, 1)
+    actions = random_actions(venv.action_space, (n_calls, batch_size), rng)
+    start = time.perf_counter()
+    for batch in actions:
+        venv.step(batch)
+    elapsed = time.perf_counter() - start
+    venv.close()
+
+    return {
+        "batch_size": batch_size,
+        "construct_seconds": construct_seconds,
+        "memory_per_env_bytes": memory / batch_size,
+        "reset_seconds": reset_seconds,
+        "steps_per_second": n_calls * batch_size / elapsed,
+    }
+
+
+def run(env_fns, batch_sizes, n_steps, n_resets, seed):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    for name, env_fn in env_fns.items():
+        print(f"{name}: single")
+        results.append({"env": name, "mode": "single",
+                        **bench_single(env_fn, n_steps, n_resets, rng)})
+
+        for batch_size in batch_sizes:
+            print(f"{name}: DummyVecEnv x {batch_size}")
+            venv_fn = partial(DummyVecEnv, [env_fn] * batch_size)
+            results.append({"env": name, "mode": "DummyVecEnv",
+                            **bench_vec(venv_fn, batch_size, n_steps, n_resets, rng)})
+
+            if name in NATIVE_VEC_ENVS:
+                mode, make_vec_env = NATIVE_VEC_ENVS[name]
+                print(f"{name}: {mode} x {batch_size}")
+                venv_fn = partial(make_vec_env, batch_size)
+                results.append({"env": name, "mode": mode,
+                                **bench_vec(venv_fn, batch_size, n_steps, n_resets, rng)})
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """
+    print the steps per second of every run against the same run in `baseline_path`
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["env"], r["mode"], r["batch_size"]): r for r in baseline["results"]}
+
+    print(f"compared to {baseline_path} ({baseline.get('commit')})")
+    for r in results:
+        key = (r["env"], r["mode"], r["batch_size"])
+        if key in previous:
+            ratio = r["steps_per_second"] / previous[key]["steps_per_second"]
+            print(f"{r['env']:>18} {r['mode']:>12} x {r['batch_size']:<4} "
+                  f"{r['steps_per_second']:>12.0f} steps/s  {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--envs", nargs="+", default=None,
+                        help="only benchmark these envs")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 64, 256])
+    parser.add_argument("--steps", type=int, default=20_000,
+                        help="env steps per measurement")
+    parser.add_argument("--resets", type=int, default=100,
+                        help="resets per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="JSON file of the results, benchmarks/<commit>.json by default")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    env_fns = get_env_fns()
+    if args.envs is not None:
+        env_fns = {name: env_fns[name] for name in args.envs}
+
+    results = run(env_fns, args.batch_sizes, args.steps, args.resets, args.seed)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "steps": args.steps,
+        "resets": args.resets,
+        "results": results,
+    }
+
+    output = args.output or os.path.join("benchmarks", f"{(commit or 'unknown')[:8]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
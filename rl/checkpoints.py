@@ -0,0 +1,164 @@
+import io
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+
+# checkpoints are named after their training step, e.g. 10000.zip
+CHECKPOINT_NAME = re.compile(r"^(\d+)\.zip$")
+
+
+class CheckpointManager:
+    """
+    Saves models from a background thread, keeps the last `keep_last`
+    checkpoints plus the best one and records them in a manifest
+    (index.json), so resuming does not need to scan the directory.
+
+    The model is serialized in memory by `save()` so the snapshot is
+    consistent with the step it is saved for, only the file writes, the
+    manifest update and the clean up of old checkpoints run in the background.
+    Files that do not look like checkpoints are left alone.
+
+    :param models_dir: (str) folder of the checkpoints
+    :param keep_last: (int) number of most recent checkpoints to keep
+    """
+
+    MANIFEST = "index.json"
+
+    def __init__(self, models_dir, keep_last=5):
+        self.models_dir = models_dir
+        self.keep_last = keep_last
+        os.makedirs(models_dir, exist_ok=True)
+
+        self.manifest = self._load_manifest()
+        # a single worker keeps the writes in the order of the saves
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = []
+
+    def _path(self, name):
+        return os.path.join(self.models_dir, name)
+
+    def _load_manifest(self):
+        try:
+            with open(self._path(self.MANIFEST)) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self._scan()
+
+        # drop entries whose file was removed by hand
+        manifest["checkpoints"] = [c for c in manifest["checkpoints"]
+                                   if os.path.exists(self._path(c["file"]))]
+        best = manifest.get("best")
+        if best is not None and not os.path.exists(self._path(best["file"])):
+            manifest["best"] = None
+        return manifest
+
+    def _scan(self):
+        """
+        build a manifest from the checkpoint files, for folders written before the manifest
+        """
+        checkpoints = []
+        for name in os.listdir(self.models_dir):
+            match = CHECKPOINT_NAME.match(name)
+            if match:
+                checkpoints.append({"step": int(match.group(1)),
+                                    "file": name, "reward": None})
+        checkpoints.sort(key=lambda c: c["step"])
+        return {"checkpoints": checkpoints, "best": None}
+
+    def _write_manifest(self):
+        tmp = self._path(self.MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self._path(self.MANIFEST))
+
+    def _write(self, step, data, reward):
+        name = f"{step}.zip"
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+
+        entry = {"step": step, "file": name, "reward": reward}
+        checkpoints = [c for c in self.manifest["checkpoints"] if c["step"] != step]
+        checkpoints.append(entry)
+        checkpoints.sort(key=lambda c: c["step"])
+
+        best = self.manifest.get("best")
+        if reward is not None and (best is None or best["reward"] is None
+                                   or reward > best["reward"]):
+            best = entry
+
+        kept = checkpoints[-self.keep_last:]
+        if best is not None and best not in kept:
+            kept.insert(0, best)
+        self.manifest = {"checkpoints": kept, "best": best}
+        self._write_manifest()
+
+        kept_files = {c["file"] for c in kept}
+        for c in checkpoints:
+            if c["file"] not in kept_files:
+                try:
+                    os.remove(self._path(c["file"]))
+                except FileNotFoundError:
+                    pass
+
+    def _raise_errors(self):
+        """
+        re-raise the errors of finished background saves
+        """
+        pending = []
+        for future in self._pending:
+            if future.done():
+                future.result()
+            else:
+                pending.append(future)
+        self._pending = pending
+
+    def save(self, model, step, reward=None):
+        """
+        :param model: (BaseAlgorithm) model to save
+        :param step: (int) training step, used as the file name
+        :param reward: (float) score used to pick the best checkpoint, None to never be the best
+        """
+        self._raise_errors()
+
+        buffer = io.BytesIO()
+        model.save(buffer)
+
+        reward = None if reward is None else float(reward)
+        self._pending.append(self._executor.submit(
+            self._write, int(step), buffer.getvalue(), reward))
+
+    def wait(self):
+        """
+        block until every save is on disk
+        """
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def latest(self):
+        """
+        :return: (str, int) path and step of the last checkpoint, (None, 0) if there is none
+        """
+        self.wait()
+        if not self.manifest["checkpoints"]:
+            return None, 0
+        last = self.manifest["checkpoints"][-1]
+        return self._path(last["file"]), last["step"]
+
+    def best(self):
+        """
+        :return: (str) path of the best checkpoint, None if no reward was given yet
+        """
+        self.wait()
+        best = self.manifest.get("best")
+        if best is None:
+            return None
+        return self._path(best["file"])
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
@@ -0,0 +1,125 @@
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from stable_baselines3 import PPO
+
+
+def evaluate_episodes(model, vec_env, n_episodes, deterministic=True):
+    """
+    Run `n_episodes` episodes spread over all the envs of `vec_env`, the
+    policy is called once per step for the whole batch.
+
+    Every env runs its own share of the episodes, so short episodes do not
+    get over-represented like they would when taking the first ones to end.
+
+    :param model: (BaseAlgorithm) the RL Agent
+    :param vec_env: (VecEnv) environments, reset automatically on done
+    :param n_episodes: (int) number of episodes to evaluate
+    :param deterministic: (bool) Whether to use deterministic or stochastic actions
+    :return: (np.ndarray, np.ndarray, int) episode rewards, episode lengths and steps taken
+    """
+    n_envs = vec_env.num_envs
+    targets = np.array([(n_episodes + i) // n_envs for i in range(n_envs)])
+    counts = np.zeros(n_envs, dtype=np.int64)
+
+    current_rewards = np.zeros(n_envs)
+    current_lengths = np.zeros(n_envs, dtype=np.int64)
+    episode_rewards = []
+    episode_lengths = []
+    steps = 0
+
+    obs = vec_env.reset()
+    states = None
+    episode_starts = np.ones(n_envs, dtype=bool)
+    while (counts < targets).any():
+        actions, states = model.predict(obs, state=states, episode_start=episode_starts,
+                                        deterministic=deterministic)
+        obs, rewards, dones, _infos = vec_env.step(actions)
+        steps += n_envs
+
+        current_rewards += rewards
+        current_lengths += 1
+
+        finished = np.flatnonzero(dones & (counts < targets))
+        episode_rewards.extend(current_rewards[finished])
+        episode_lengths.extend(current_lengths[finished])
+        counts[finished] += 1
+
+        current_rewards[dones] = 0
+        current_lengths[dones] = 0
+        episode_starts = dones
+
+    return np.array(episode_rewards), np.array(episode_lengths), steps
+
+
+def _evaluate_worker(model_path, algo, venv_fn, n_episodes, deterministic, seed):
+    import torch
+
+    # the workers already use every core, one thread each avoids oversubscription
+    torch.set_num_threads(1)
+
+    model = algo.load(model_path, device="cpu")
+    vec_env = venv_fn()
+    if seed is not None:
+        vec_env.seed(seed)
+
+    # only the episodes are timed, not the process start, imports and model loading
+    start = time.perf_counter()
+    episode_rewards, episode_lengths, steps = evaluate_episodes(model, vec_env, n_episodes,
+                                                                deterministic)
+    seconds = time.perf_counter() - start
+    vec_env.close()
+    return episode_rewards, episode_lengths, steps, seconds
+
+
+def evaluate_parallel(model_path, venv_fn, n_episodes, n_workers=1, algo=PPO,
+                      deterministic=True, seed=None):
+    """
+    Evaluate a saved model on `n_episodes` episodes split over `n_workers` processes,
+    each loading the model and stepping its own vectorized env.
+
+    :param model_path: (str) path of the saved model
+    :param venv_fn: (callable) builds the VecEnv of one worker, must be picklable
+    :param n_episodes: (int) number of episodes in total
+    :param n_workers: (int) number of worker processes
+    :param algo: (type) algorithm class used to load the model
+    :param deterministic: (bool) Whether to use deterministic or stochastic actions
+    :param seed: (int) seed of the first worker, the others use seed + worker index
+    :return: (dict) reward and length statistics, and steps per second of the
+        episodes, timed in the workers from the slowest of them, which run at once
+    """
+    shares = [(n_episodes + i) // n_workers for i in range(n_workers)]
+    shares = [share for share in shares if share > 0]
+
+    start = time.perf_counter()
+    if len(shares) == 1:
+        results = [_evaluate_worker(model_path, algo, venv_fn, shares[0],
+                                    deterministic, seed)]
+    else:
+        ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods()
+                             else "spawn")
+        with ProcessPoolExecutor(max_workers=len(shares), mp_context=ctx) as executor:
+            futures = [executor.submit(_evaluate_worker, model_path, algo, venv_fn, share,
+                                       deterministic, None if seed is None else seed + i)
+                       for i, share in enumerate(shares)]
+            results = [future.result() for future in futures]
+    wall_seconds = time.perf_counter() - start
+
+    episode_rewards = np.concatenate([r[0] for r in results])
+    episode_lengths = np.concatenate([r[1] for r in results])
+    steps = sum(r[2] for r in results)
+    seconds = max(r[3] for r in results)
+
+    return {
+        "episodes": len(episode_rewards),
+        "mean_reward": float(np.mean(episode_rewards)),
+        "std_reward": float(np.std(episode_rewards)),
+        "mean_length": float(np.mean(episode_lengths)),
+        "std_length": float(np.std(episode_lengths)),
+        "steps": int(steps),
+        "seconds": seconds,
+        "steps_per_second": steps / seconds,
+        "wall_seconds": wall_seconds,
+    }
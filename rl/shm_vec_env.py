@@ -0,0 +1,220 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+
+def _action_layout(action_space):
+    """
+    shape and dtype of one action in the shared action array
+    """
+    if isinstance(action_space, spaces.Discrete):
+        return (), np.int64
+    return action_space.shape, action_space.dtype
+
+
+def _worker(remote, parent_remote, venv_fn_wrapper):
+    parent_remote.close()
+    venv = venv_fn_wrapper.var()
+    remote.send((venv.num_envs, venv.observation_space, venv.action_space))
+
+    # the parent allocates the shared arrays once it knows every worker's size
+    blocks, start = remote.recv()
+    stop = start + venv.num_envs
+    attached = []
+    arrays = []
+    for name, shape, dtype in blocks:
+        shm = shared_memory.SharedMemory(name=name)
+        attached.append(shm)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop])
+    observations, actions, rewards, dones = arrays
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, rews, dns, infos = venv.step(actions.copy())
+                observations[:] = obs
+                rewards[:] = rews
+                dones[:] = dns
+                # only the infos that carry something go through the pipe
+                remote.send([(i, info) for i, info in enumerate(infos) if info])
+            elif cmd == "reset":
+                observations[:] = venv.reset()
+                remote.send(None)
+            elif cmd == "seed":
+                remote.send(venv.seed(data))
+            elif cmd == "get_attr":
+                remote.send(venv.get_attr(data[0], data[1]))
+            elif cmd == "set_attr":
+                remote.send(venv.set_attr(data[0], data[1], data[2]))
+            elif cmd == "env_method":
+                remote.send(venv.env_method(data[0], *data[1], indices=data[3], **data[2]))
+            elif cmd == "is_wrapped":
+                remote.send(venv.env_is_wrapped(data[0], data[1]))
+            elif cmd == "close":
+                venv.close()
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # drop the views before closing the blocks they point to
+        del observations, actions, rewards, dones, arrays
+        for shm in attached:
+            shm.close()
+        remote.close()
+
+
+class ShmVecEnv(VecEnv):
+    """
+    Runs a batched VecEnv (e.g. SnakeVecEnv) in each of `n_workers` processes.
+
+    Actions, observations, rewards and dones are exchanged through shared
+    memory arrays, the pipes only carry the command and the non-empty infos,
+    so the cost per step does not grow with the observation size.
+
+    With 'forkserver' and 'spawn' (the default) the training script must be
+    wrapped in an ``if __name__ == "__main__":`` block.
+
+    :param venv_fn: (callable) builds the VecEnv of one worker, must be picklable,
+        or a list of them, one per worker
+    :param n_workers: (int) number of worker processes, the length of the list if None
+    :param start_method: (str) multiprocessing start method
+    """
+
+    def __init__(self, venv_fn, n_workers=None, start_method=None):
+        self.waiting = False
+        self.closed = False
+
+        if start_method is None:
+            forkserver_available = "forkserver" in mp.get_all_start_methods()
+            start_method = "forkserver" if forkserver_available else "spawn"
+        ctx = mp.get_context(start_method)
+
+        venv_fns = list(venv_fn) if isinstance(venv_fn, (list, tuple)) else [venv_fn] * n_workers
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in venv_fns])
+        self.processes = []
+        for work_remote, remote, fn in zip(self.work_remotes, self.remotes, venv_fns):
+            args = (work_remote, remote, CloudpickleWrapper(fn))
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        sizes = []
+        for remote in self.remotes:
+            n_envs, observation_space, action_space = remote.recv()
+            sizes.append(n_envs)
+        # global env index of the first env of each worker
+        self.starts = np.concatenate([[0], np.cumsum(sizes)])
+        num_envs = int(self.starts[-1])
+
+        action_shape, action_dtype = _action_layout(action_space)
+        layout = [
+            ((num_envs,) + observation_space.shape, observation_space.dtype),
+            ((num_envs,) + action_shape, action_dtype),
+            ((num_envs,), np.float32),
+            ((num_envs,), np.bool_),
+        ]
+        self.shms = []
+        blocks = []
+        arrays = []
+        for shape, dtype in layout:
+            dtype = np.dtype(dtype)
+            nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.shms.append(shm)
+            blocks.append((shm.name, shape, dtype))
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+        self.observations, self.actions, self.rewards, self.dones = arrays
+
+        for remote, start in zip(self.remotes, self.starts[:-1]):
+            remote.send((blocks, int(start)))
+
+        super().__init__(num_envs, observation_space, action_space)
+
+    def _worker_indices(self, indices):
+        """
+        group global env indices by worker, as (remote, local indices)
+        """
+        groups = {}
+        for i in self._get_indices(indices):
+            worker = int(np.searchsorted(self.starts, i, side="right")) - 1
+            groups.setdefault(worker, []).append(int(i - self.starts[worker]))
+        return [(self.remotes[worker], local) for worker, local in groups.items()]
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        for remote in self.remotes:
+            remote.recv()
+        return self.observations.copy()
+
+    def step_async(self, actions):
+        self.actions[:] = np.asarray(actions).reshape(self.actions.shape)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = [{} for _ in range(self.num_envs)]
+        for remote, start in zip(self.remotes, self.starts):
+            for i, info in remote.recv():
+                infos[start + i] = info
+        self.waiting = False
+        return self.observations.copy(), self.rewards.copy(), self.dones.copy(), infos
+
+    def seed(self, seed=None):
+        seeds = []
+        for remote, start in zip(self.remotes, self.starts):
+            remote.send(("seed", None if seed is None else seed + int(start)))
+        for remote in self.remotes:
+            seeds.extend(remote.recv())
+        return seeds
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        del self.observations, self.actions, self.rewards, self.dones
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        results = []
+        for remote, local in self._worker_indices(indices):
+            remote.send(("get_attr", (attr_name, local)))
+            results.extend(remote.recv())
+        return results
+
+    def set_attr(self, attr_name, value, indices=None):
+        for remote, local in self._worker_indices(indices):
+            remote.send(("set_attr", (attr_name, value, local)))
+            remote.recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        results = []
+        for remote, local in self._worker_indices(indices):
+            remote.send(("env_method", (method_name, method_args, method_kwargs, local)))
+            results.extend(remote.recv())
+        return results
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        results = []
+        for remote, local in self._worker_indices(indices):
+            remote.send(("is_wrapped", (wrapper_class, local)))
+            results.extend(remote.recv())
+        return results
@@ -0,0 +1,71 @@
+from collections import deque
+
+
+# the board is 500x500 pixels, made of 10x10 pixel cells
+GRID_SIZE = 50
+CELL_SIZE = 10
+
+
+class SnakeBody:
+    """
+    Snake body kept as a deque of (x, y) positions, head first, plus a 50x50
+    occupancy grid, so moving and checking self collision are constant time
+    however long the snake gets.
+
+    :param positions: ([[int, int]]) initial body positions in pixels, head first
+    """
+
+    def __init__(self, positions):
+        self.positions = deque()
+        # number of body parts on each cell, parts outside the board are not counted
+        self.occupancy = bytearray(GRID_SIZE * GRID_SIZE)
+
+        for position in positions:
+            position = tuple(position)
+            self.positions.append(position)
+            self._add(position)
+
+    def _cell(self, position):
+        x = position[0] // CELL_SIZE
+        y = position[1] // CELL_SIZE
+        if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE:
+            return x * GRID_SIZE + y
+        return None
+
+    def _add(self, position):
+        cell = self._cell(position)
+        if cell is not None:
+            self.occupancy[cell] += 1
+
+    def _remove(self, position):
+        cell = self._cell(position)
+        if cell is not None:
+            self.occupancy[cell] -= 1
+
+    @property
+    def head(self):
+        return self.positions[0]
+
+    def move(self, head, grow=False):
+        """
+        put the head on a new position, the tail follows unless the snake grows
+        """
+        head = tuple(head)
+        self.positions.appendleft(head)
+        self._add(head)
+
+        if not grow:
+            self._remove(self.positions.pop())
+
+    def hits_self(self):
+        """
+        whether the head shares its cell with another part of the body
+        """
+        cell = self._cell(self.head)
+        return cell is not None and self.occupancy[cell] > 1
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
@@ -0,0 +1,66 @@
+"""
+Train PPO on the snake game with worker processes.
+
+Each worker steps a SnakeVecEnv of --envs-per-worker games and hands back
+observations and rewards through shared memory (see ShmVecEnv).
+
+    python train_snake.py --workers 32 --envs-per-worker 8 --steps-per-worker 1000000
+"""
+import argparse
+import os
+import time
+from functools import partial
+
+import numpy as np
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecMonitor
+
+from SnakeEnv import SnakeVecEnv
+from shm_vec_env import ShmVecEnv
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--envs-per-worker", type=int, default=8,
+                        help="snake games stepped together in each worker")
+    parser.add_argument("--steps-per-worker", type=int, default=100_000,
+                        help="env steps each worker runs, the total is workers * steps-per-worker")
+    parser.add_argument("--n-steps", type=int, default=128,
+                        help="rollout length per game before each PPO update")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--models-dir", default=os.path.join('models', 'snake-ppo-parallel'))
+    parser.add_argument("--logdir", default=os.path.join('logs', 'snake-ppo-parallel'))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    os.makedirs(args.models_dir, exist_ok=True)
+    os.makedirs(args.logdir, exist_ok=True)
+
+    venv_fn = partial(SnakeVecEnv, args.envs_per_worker, obs_dtype=np.float32)
+    env = VecMonitor(ShmVecEnv(venv_fn, args.workers))
+
+    total_timesteps = args.workers * args.steps_per_worker
+    print(f"{env.num_envs} games on {args.workers} workers, {total_timesteps} steps")
+
+    model = PPO('MlpPolicy', env, n_steps=args.n_steps, batch_size=args.batch_size,
+                seed=args.seed, verbose=1, tensorboard_log=args.logdir)
+
+    start = time.perf_counter()
+    model.learn(total_timesteps=total_timesteps, tb_log_name=f"{total_timesteps}")
+    elapsed = time.perf_counter() - start
+
+    print(f"{model.num_timesteps / elapsed:.0f} env steps per second")
+
+    model.save(f"{args.models_dir}/{model.num_timesteps}")
+    env.close()
+
+
+if __name__ == "__main__":
+    main()
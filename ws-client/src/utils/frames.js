@@ -0,0 +1,137 @@
+// Binary frames from py-ws are a 9 bytes header followed by the encoded image:
+// frame id (uint32), width (uint16), height (uint16), codec (uint8), big endian
+export const HEADER_SIZE = 9;
+
+export const CODEC_MIME = {
+	1: "image/png",
+	2: "image/jpeg",
+	3: "image/webp",
+};
+
+/**
+ * Split a binary frame into its header fields and the encoded image
+ *
+ * @param {ArrayBuffer} buffer
+ * @returns {{frameId: number, width: number, height: number, mime: string, image: Blob}}
+ */
+export function parseFrame(buffer) {
+	const view = new DataView(buffer);
+	const codec = view.getUint8(8);
+
+	return {
+		frameId: view.getUint32(0),
+		width: view.getUint16(4),
+		height: view.getUint16(6),
+		mime: CODEC_MIME[codec],
+		image: new Blob([buffer.slice(HEADER_SIZE)], {
+			type: CODEC_MIME[codec],
+		}),
+	};
+}
+
+// Delta frames add after the header the id of the frame they apply to (uint32),
+// flags (uint8), the tile size (uint16) and the number of tiles (uint16),
+// then the column and row (uint16, uint16) of every tile
+export const DELTA_HEADER_SIZE = HEADER_SIZE + 9;
+export const KEYFRAME = 1;
+
+/**
+ * Split a delta frame into its header fields, tiles and encoded image
+ *
+ * @param {ArrayBuffer} buffer
+ * @returns {{frameId: number, baseId: number, width: number, height: number, keyframe: boolean,
+ *   tileSize: number, tiles: Array<[number, number]>, mime: string, image: Blob | null}}
+ */
+export function parseDelta(buffer) {
+	const view = new DataView(buffer);
+	const codec = view.getUint8(8);
+	const tileCount = view.getUint16(HEADER_SIZE + 7);
+
+	const tiles = [];
+	for (let i = 0; i < tileCount; i++) {
+		const offset = DELTA_HEADER_SIZE + 4 * i;
+		tiles.push([view.getUint16(offset), view.getUint16(offset + 2)]);
+	}
+
+	const data = buffer.slice(DELTA_HEADER_SIZE + 4 * tileCount);
+
+	return {
+		frameId: view.getUint32(0),
+		baseId: view.getUint32(HEADER_SIZE),
+		width: view.getUint16(4),
+		height: view.getUint16(6),
+		keyframe: (view.getUint8(HEADER_SIZE + 4) & KEYFRAME) !== 0,
+		tileSize: view.getUint16(HEADER_SIZE + 5),
+		tiles,
+		mime: CODEC_MIME[codec],
+		// no image when nothing changed
+		image: data.byteLength > 0 ? new Blob([data], { type: CODEC_MIME[codec] }) : null,
+	};
+}
+
+/**
+ * Draws delta frames on a canvas, keeping the last complete frame
+ */
+export class FrameCompositor {
+	/**
+	 * @param {HTMLCanvasElement} canvas
+	 */
+	constructor(canvas) {
+		this.canvas = canvas;
+		this.context = canvas.getContext("2d");
+		this.frameId = null;
+		// frames are decoded asynchronously, chain them to draw in order
+		this.pending = Promise.resolve(true);
+	}
+
+	/**
+	 * Draw a delta frame over the current one
+	 *
+	 * @param {ReturnType<typeof parseDelta>} frame
+	 * @returns {Promise<boolean>} false when the frame does not apply to the
+	 *   current one and a keyframe must be asked for
+	 */
+	apply(frame) {
+		this.pending = this.pending
+			.then(() => this.draw(frame))
+			.catch((error) => {
+				// a broken frame leaves the canvas stale, start again from a keyframe
+				console.error(error);
+				this.frameId = null;
+				return false;
+			});
+		return this.pending;
+	}
+
+	async draw(frame) {
+		if (!frame.keyframe && frame.baseId !== this.frameId) {
+			return false;
+		}
+
+		const bitmap = frame.image ? await createImageBitmap(frame.image) : null;
+
+		if (frame.keyframe) {
+			this.canvas.width = frame.width;
+			this.canvas.height = frame.height;
+			this.context.clearRect(0, 0, frame.width, frame.height);
+			this.context.drawImage(bitmap, 0, 0);
+		} else if (bitmap) {
+			// the tiles are packed row by row, as many per row as in the frame
+			const size = frame.tileSize;
+			const columns = Math.ceil(frame.width / size);
+
+			frame.tiles.forEach(([column, row], i) => {
+				const x = (i % columns) * size;
+				const y = Math.floor(i / columns) * size;
+				this.context.clearRect(column * size, row * size, size, size);
+				this.context.drawImage(bitmap, x, y, size, size, column * size, row * size, size, size);
+			});
+		}
+
+		if (bitmap) {
+			bitmap.close();
+		}
+		this.frameId = frame.frameId;
+		return true;
+	}
+}